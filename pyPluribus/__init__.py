@@ -18,4 +18,10 @@ Import lib objects
 """
 
 from __future__ import absolute_import
+import sys
+
 from pyPluribus.device import PluribusDevice  # noqa
+from pyPluribus.fleet import PluribusFleet  # noqa
+
+if sys.version_info >= (3, 5):
+    from pyPluribus.asyncdevice import AsyncPluribusDevice  # noqa
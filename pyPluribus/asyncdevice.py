@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+# Copyright 2016 CloudFlare, Inc. All rights reserved.
+#
+# The contents of this file are licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the
+# License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""
+Contains the AsyncPluribusDevice and AsyncPluribusConfig classes: asyncio interface to Pluribus devices.
+Requires Python 3.5 or newer.
+
+The connection is still established and managed by a PluribusDevice object. Only the short blocking steps
+(SSH handshake, opening a session, sending the command) run in the executor of the event loop: the output is
+awaited on the event loop, thus no thread is held while the device executes the command.
+"""
+
+import asyncio
+import functools
+
+# local modules
+import pyPluribus.exceptions
+from pyPluribus.device import PluribusDevice
+from pyPluribus.device import _RECV_SIZE, _RELOGIN_MESSAGE
+from pyPluribus.device import _format_show_command, _normalize_show_command, _strip_banner
+from pyPluribus.instrumentation import command_timer
+
+
+class AsyncPluribusDevice(object):
+
+    """
+    Connection establishment and basic interaction with a Pluribus device, from asyncio coroutines.
+    Raises the same exceptions as PluribusDevice.
+    """
+
+    def __init__(self, hostname, username, password, port=22, timeout=60,  # pylint: disable=too-many-arguments
+                 keepalive=60, max_sessions=10, config_cache_ttl=None, initial_config='lazy', max_config_history=None,
+                 instrumentation=None, show_cache=None, single_flight=True, reconnect_attempts=3,
+                 reconnect_backoff=1.0, transport_registry=None, transport='paramiko', transport_options=None):
+        self._device = PluribusDevice(hostname, username, password, port=port, timeout=timeout,
+                                      keepalive=keepalive, max_sessions=max_sessions,
+                                      config_cache_ttl=config_cache_ttl, initial_config=initial_config,
+                                      max_config_history=max_config_history, instrumentation=instrumentation,
+                                      show_cache=show_cache, single_flight=single_flight,
+                                      reconnect_attempts=reconnect_attempts, reconnect_backoff=reconnect_backoff,
+                                      transport_registry=transport_registry, transport=transport,
+                                      transport_options=transport_options)
+        self._timeout = timeout
+        self._single_flight = single_flight
+        self._flights = {}  # (command, write count) -> task executing the command
+        self._max_sessions = max_sessions
+        self._sessions = None  # created in the event loop using it: before Python 3.10, bound to a loop
+        self._sessions_loop = None
+        self.config = None
+
+    @property
+    def hostname(self):
+        """Hostname of the device."""
+        return self._device.hostname
+
+    @property
+    def connected(self):
+        """Tells if the connection is open."""
+        return self._device.connected
+
+    def _session_limit(self):
+        """The semaphore limiting the sessions open at the same time, in the current event loop; None: no limit."""
+        if not self._max_sessions:
+            return None
+        loop = asyncio.get_event_loop()
+        if self._sessions_loop is not loop:
+            self._sessions = asyncio.Semaphore(self._max_sessions)
+            self._sessions_loop = loop
+        return self._sessions
+
+    async def _run_in_executor(self, function, *args):
+        """Runs a blocking function in the executor of the event loop."""
+        return await asyncio.get_event_loop().run_in_executor(None, functools.partial(function, *args))
+
+    # ---- Connection management -------------------------------------------------------------------------------------->
+
+    async def open(self):
+        """Opens a SSH connection with a Pluribus machine."""
+        await self._run_in_executor(self._device.open)
+        self.config = AsyncPluribusConfig(self._device.config)
+
+    async def reconnect(self):
+        """Opens the SSH connection again, keeping the configuration object. See PluribusDevice.reconnect()."""
+        await self._run_in_executor(self._device.reconnect)
+        if self.config is None:
+            self.config = AsyncPluribusConfig(self._device.config)
+
+    async def close(self):
+        """Closes the SSH connection if the connection is UP."""
+        await self._run_in_executor(self._device.close)
+        self.config = None
+
+    # <--- Connection management ---------------------------------------------------------------------------------------
+
+    def _open_and_execute(self, command, timer):
+        """Opens a new session and sends the command. Blocking, executed in the executor."""
+        ssh_session = self._device.open_command_session(command)
+        timer.phase('session_open')
+        try:
+            ssh_session.exec_command(command)
+            timer.phase('exec')
+            ssh_session.fileno()  # from now on, the data received is signalled on a file descriptor
+        except Exception:
+            self._device.close_command_session(ssh_session, command)
+            raise
+        return ssh_session
+
+    async def _read(self, ssh_session, timer):
+        """Waits on the event loop for the output of the command, till EOF. Returns the stdout and stderr."""
+        recv = timer.count(ssh_session.recv)
+        loop = asyncio.get_event_loop()
+        readable = asyncio.Event()
+        file_descriptor = ssh_session.fileno()
+        loop.add_reader(file_descriptor, readable.set)
+        ssh_output = []
+        err_output = []
+        try:
+            while True:
+                readable.clear()
+                while ssh_session.recv_ready():
+                    ssh_output.append(recv(_RECV_SIZE))
+                while ssh_session.recv_stderr_ready():
+                    err_output.append(ssh_session.recv_stderr(_RECV_SIZE))
+                if ssh_session.eof_received and not (ssh_session.recv_ready() or ssh_session.recv_stderr_ready()):
+                    break
+                try:
+                    await asyncio.wait_for(readable.wait(), self._timeout)
+                except asyncio.TimeoutError:
+                    raise pyPluribus.exceptions.TimeoutError('The device did not send the output in time.')
+        finally:
+            loop.remove_reader(file_descriptor)
+        return b''.join(ssh_output).decode('utf-8', 'replace'), b''.join(err_output).decode('utf-8', 'replace')
+
+    async def cli(self, command):
+        """
+        Executes a command and returns raw output from the CLI.
+
+        :param command: Command to be executed on the CLI.
+        :raise pyPluribus.exceptions.TimeoutError: when execution of the command exceeds the timeout
+        :raise pyPluribus.exceptions.CommandExecutionError: when not able to retrieve the output
+        :return: Raw output of the command
+
+        CLI Example:
+
+        .. code-block:: python
+
+            await device.cli('switch-poweroff')
+        """
+        if not self.connected:
+            raise pyPluribus.exceptions.ConnectionError("Not connected to the deivce.")
+
+        attempts = self._device.login_attempts()
+        # the connection is opened again, if needed, when asking for the next attempt: blocking
+        while await self._run_in_executor(next, attempts, None) is not None:
+            cli_output = await self._execute(command)
+            if cli_output != _RELOGIN_MESSAGE:
+                return cli_output
+        raise pyPluribus.exceptions.ConnectionError("The device asks to log in again after reconnecting.")
+
+    async def _execute(self, command):
+        """Executes a command in a new session and returns the output, without banner."""
+        timer = command_timer(self._device.instrumentation, command)
+        error = None
+        try:
+            sessions = self._session_limit()
+            if sessions is not None:
+                await sessions.acquire()
+            try:
+                ssh_session = await self._run_in_executor(self._open_and_execute, command, timer)
+                try:
+                    ssh_output, err_output = await self._read(ssh_session, timer)
+                finally:
+                    self._device.close_command_session(ssh_session, command)
+            finally:
+                if sessions is not None:
+                    sessions.release()
+
+            if not ssh_output:
+                if err_output:
+                    raise pyPluribus.exceptions.CommandExecutionError(err_output)
+        except Exception as clierr:
+            error = clierr
+            raise
+        finally:
+            timer.finish(error)
+
+        return _strip_banner(ssh_output)
+
+    async def execute_show(self, show_command, delim=';'):
+        """
+        Executes show-type commands on the CLI and returns parsable output usinng ';' as delimitor.
+        When the same command is already awaited by another task, returns the same output, unless the device has been
+        initialised with `single_flight=False`.
+
+        :param show_command: Show command to be executed
+        :param delim: Will use specific delimitor. Default: ';'
+        :raise pyPluribus.exceptions.TimeoutError: when execution of the command exceeds the timeout
+        :raise pyPluribus.exceptions.CommandExecutionError: when not able to retrieve the output
+        :return: Parsable output
+        """
+        command = _format_show_command(show_command, delim)
+        show_cache = self._device.show_cache
+        write_count = self._device.write_count
+        if show_cache is not None:
+            cli_output = show_cache.get(command, write_count)
+            if cli_output is not None:
+                return cli_output
+        if self._single_flight:
+            cli_output = await self._execute_once(command, write_count)
+        else:
+            cli_output = await self.cli(command)
+        if show_cache is not None:
+            show_cache.put(command, write_count, cli_output)
+        return cli_output
+
+    def _execute_once(self, command, write_count):
+        """
+        Executes a show command, unless the same command is already in progress: then returns the same output.
+        The command runs in its own task, thus cancelling one of the callers does not cancel it for the others.
+        """
+        key = (command, write_count)
+        task = self._flights.get(key)
+        if task is None:
+            task = self._flights[key] = asyncio.ensure_future(self.cli(command))
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        return asyncio.shield(task)
+
+    async def show(self, command, delim=';'):
+        """
+        Executes show-type commands on the CLI and returns parsable output usinng ';' as delimitor.
+
+        :param command: Command to be executed
+        :param delim: Custom delimiter. Default value: ';'
+        :raise pyPluribus.exceptions.TimeoutError: when execution of the command exceeds the timeout
+        :raise pyPluribus.exceptions.CommandExecutionError: when not able to retrieve the output
+        :return: Parsable output of the requred stanza
+
+        CLI Example:
+
+        .. code-block:: python
+
+            await asyncio.gather(device.show('switch info'), device.show('l2 table'))
+        """
+        return await self.execute_show(_normalize_show_command(command), delim)
+
+
+class AsyncPluribusConfig(object):
+
+    """
+    Awaitable configuration-specific methods, see PluribusConfig.
+    The operations are executed one at a time, in the executor of the event loop.
+    """
+
+    def __init__(self, config):
+        self._config = config
+        self._lock = asyncio.Lock()
+
+    async def _run(self, method, *args, **kwargs):
+        """Executes a method of the PluribusConfig object, waiting for the operations in progress to finish."""
+        async with self._lock:
+            return await asyncio.get_event_loop().run_in_executor(
+                None,
+                functools.partial(method, *args, **kwargs)
+            )
+
+    async def load_candidate(self, filename=None, config=None,  # pylint: disable=too-many-arguments
+                             skip_unchanged=False, coalesce=False, progress=None):
+        """
+        Loads a candidate configuration on the device. See PluribusConfig.load_candidate().
+        The progress callable is called from the executor thread.
+        """
+        return await self._run(self._config.load_candidate, filename=filename, config=config,
+                               skip_unchanged=skip_unchanged, coalesce=coalesce, progress=progress)
+
+    async def changed(self):
+        """Returns if the configuration changes loaded had actually any effect on running config on the device"""
+        return await self._run(self._config.changed)
+
+    async def committed(self):
+        """Returns if the configuration was committed"""
+        return await self._run(self._config.committed)
+
+    async def skipped(self):
+        """Returns the number of lines of the last configuration loaded which were not sent, being already running"""
+        return await self._run(self._config.skipped)
+
+    async def discard(self):
+        """Clears uncommited changes. See PluribusConfig.discard()."""
+        return await self._run(self._config.discard)
+
+    async def commit(self):
+        """Will commit the changes on the device"""
+        return await self._run(self._config.commit)
+
+    async def compare(self, structured=False):
+        """Computes the difference between the candidate config and the running config. See PluribusConfig.compare()."""
+        return await self._run(self._config.compare, structured=structured)
+
+    async def model(self):
+        """Returns the running config parsed and indexed. See PluribusConfig.model()."""
+        return await self._run(self._config.model)
+
+    async def rollback(self, number=0):
+        """Will rollback the configuration to a previous state. See PluribusConfig.rollback()."""
+        return await self._run(self._config.rollback, number)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# Copyright 2016 CloudFlare, Inc. All rights reserved.
+#
+# The contents of this file are licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the
+# License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""
+Contains the ShowCache class: cache of the output of the show commands, limited in time and size, dropped as soon as
+a command other than show-type is executed through the device.
+"""
+
+from __future__ import absolute_import
+
+import collections
+import threading
+import time
+
+
+class CacheStats(collections.namedtuple('CacheStats', ['hits', 'misses', 'invalidations', 'evictions', 'size'])):
+
+    """Statistics of a ShowCache: outputs returned from the cache, outputs not found or expired, number of times the
+    cache was dropped because of a change, outputs dropped to make room, and outputs cached now."""
+
+    __slots__ = ()
+
+
+class ShowCache(object):
+
+    """
+    Caches the output of the show commands executed by a PluribusDevice.
+    The outputs are tagged with the counter of the changes made through the device (PluribusDevice.write_count): as
+    soon as the counter changes, e.g. after cli('vlan-create ...') or a configuration load, the whole cache is
+    dropped.
+    """
+
+    def __init__(self, ttl=60, max_size=256, ttls=None):
+        """
+        :param ttl: Number of seconds an output is valid. Default: 60
+        :param max_size: Maximum number of outputs cached; the least recently used are dropped first. Default: 256
+        :param ttls: TTL of specific commands: dictionary show command -> seconds, e.g. {'switch-info-show': 3600,
+            'l2-table-show': 0}. A TTL of 0 disables the cache for the command.
+        """
+        self._ttl = ttl
+        self._max_size = max_size
+        self._ttls = dict(ttls or {})
+        self._entries = collections.OrderedDict()  # command -> (expiration time, output); least recently used first
+        self._write_count = 0  # the outputs cached were read when PluribusDevice.write_count had this value
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._evictions = 0
+
+    def _ttl_of(self, command):
+        """The TTL of a command."""
+        return self._ttls.get(command.split(None, 1)[0], self._ttl)
+
+    def _check_write_count(self, write_count):
+        """
+        Drops the outputs read before the device executed other changes.
+        Returns False when the write count is older than the outputs cached.
+        """
+        if write_count > self._write_count:
+            if self._entries:
+                self._entries.clear()
+                self._invalidations += 1
+            self._write_count = write_count
+        return write_count == self._write_count
+
+    def get(self, command, write_count):
+        """
+        Returns the output of a command, if cached and still valid, else None.
+
+        :param command: Show command, as sent to the device.
+        :param write_count: PluribusDevice.write_count now.
+        """
+        with self._lock:
+            self._check_write_count(write_count)
+            entry = self._entries.pop(command, None)
+            if entry is None or entry[0] <= time.time():
+                self._misses += 1
+                return None
+            self._entries[command] = entry  # most recently used
+            self._hits += 1
+            return entry[1]
+
+    def put(self, command, write_count, output):
+        """
+        Caches the output of a command.
+
+        :param command: Show command, as sent to the device.
+        :param write_count: PluribusDevice.write_count before sending the command.
+        :param output: Output of the command.
+        """
+        ttl = self._ttl_of(command)
+        if not ttl or not self._max_size:
+            return
+        with self._lock:
+            if not self._check_write_count(write_count):
+                return  # the device executed changes meanwhile: the output might not be accurate anymore
+            self._entries.pop(command, None)
+            self._entries[command] = (time.time() + ttl, output)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        """Drops all the outputs cached."""
+        with self._lock:
+            if self._entries:
+                self._entries.clear()
+                self._invalidations += 1
+
+    def stats(self):
+        """
+        Returns the statistics of the cache.
+
+        :return: CacheStats
+        """
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._invalidations, self._evictions, len(self._entries))
@@ -19,10 +19,158 @@ This module contains configuration-specific class PluribusConfig and necessary h
 
 from __future__ import absolute_import
 
+import collections
 import difflib
+import functools
+import hashlib
+import threading
+import time
 
 # local modules
 import pyPluribus.exceptions
+import pyPluribus.instrumentation
+import pyPluribus.objects
+from pyPluribus.model import RunningConfig
+
+
+class LoadProgress(collections.namedtuple('LoadProgress', ['applied', 'skipped', 'total', 'elapsed', 'throughput',
+                                                           'eta'])):
+
+    """Progress of a configuration load: lines applied and skipped so far, total number of lines (None if unknown),
+    seconds elapsed, lines per second and estimated number of seconds remaining (None if unknown)."""
+
+    __slots__ = ()
+
+
+def _load_progress(applied, skipped, total, started):
+    """Computes the progress of a configuration load."""
+    elapsed = time.time() - started
+    throughput = (applied + skipped) / elapsed if elapsed > 0 else 0.0
+    eta = None
+    if total is not None and throughput > 0:
+        eta = max(total - applied - skipped, 0) / throughput
+    return LoadProgress(applied, skipped, total, elapsed, throughput, eta)
+
+
+def _span(name):
+    """Reports the method as a span to the instrumentation of the device, if any."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            device = self._device  # pylint: disable=protected-access
+            with pyPluribus.instrumentation.span(device.instrumentation, name, device):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _candidate_commands(lines, coalesce=False):
+    """Yields the commands of a configuration, as the lines are read."""
+    commands = (line.rstrip('\r\n') for line in lines)
+    if coalesce:
+        commands = pyPluribus.objects.compile_config(commands)
+    return commands
+
+
+class ConfigHistory(object):
+
+    """
+    History of the configurations, stored as a base snapshot and the line differences from the base.
+    Identical configurations are identified by their hash and stored only once.
+    Any version is rebuilt only when requested.
+    When the configurations drifted too far from the base, the newest configuration becomes the new base.
+    """
+
+    def __init__(self, max_size=None):
+        """
+        :param max_size: Maximum number of versions kept; the oldest versions are dropped. Default: no limit.
+        """
+        self._max_size = max_size
+        self._versions = []  # hash of the configuration, for each version
+        self._references = collections.Counter()  # number of versions, for each hash
+        self._base_hash = None
+        self._base_lines = []
+        self._matcher = difflib.SequenceMatcher(None, [], [], autojunk=False)  # indexes the lines of the base
+        self._deltas = {}  # hash -> operations rebuilding the configuration from the base
+        self._delta_lines = 0  # total number of lines stored in the deltas
+
+    def __len__(self):
+        return len(self._versions)
+
+    def __getitem__(self, index):
+        return self._rebuild(self._versions[index])
+
+    def _delta(self, lines):
+        """
+        Computes the operations transforming the base into the lines: (start, end, lines replacing base[start:end]).
+        """
+        self._matcher.set_seq1(lines)
+        delta = [(base_start, base_end, tuple(lines[start:end]))
+                 for tag, start, end, base_start, base_end in self._matcher.get_opcodes() if tag != 'equal']
+        self._matcher.set_seq1([])  # do not keep a reference to the lines
+        return delta
+
+    def _rebuild(self, config_hash):
+        """Rebuilds the configuration having the hash."""
+        lines = []
+        position = 0
+        for base_start, base_end, replacement in self._deltas[config_hash]:
+            lines.extend(self._base_lines[position:base_start])
+            lines.extend(replacement)
+            position = base_end
+        lines.extend(self._base_lines[position:])
+        return '\n'.join(lines)
+
+    def _store(self, config_hash, delta):
+        """Stores the delta of a configuration."""
+        self._deltas[config_hash] = delta
+        self._delta_lines += sum(len(replacement) for _, _, replacement in delta)
+
+    def _drop(self, config_hash):
+        """Drops the delta of a configuration."""
+        delta = self._deltas.pop(config_hash)
+        self._delta_lines -= sum(len(replacement) for _, _, replacement in delta)
+
+    def _rebase(self, config_hash):
+        """Uses the configuration having the hash as base and recomputes all deltas."""
+        configs = dict((stored_hash, self._rebuild(stored_hash).split('\n')) for stored_hash in self._references)
+        self._base_hash = config_hash
+        self._base_lines = configs[config_hash]
+        self._matcher.set_seq2(self._base_lines)
+        self._deltas = {}
+        self._delta_lines = 0
+        for stored_hash, lines in configs.items():
+            self._store(stored_hash, self._delta(lines))
+
+    def _release(self, config_hash):
+        """One version less having this configuration."""
+        self._references[config_hash] -= 1
+        if self._references[config_hash] <= 0:
+            del self._references[config_hash]
+            if config_hash != self._base_hash:  # the base is needed till the next rebase
+                self._drop(config_hash)
+
+    def append(self, config):
+        """Adds a new version."""
+        config_hash = hashlib.sha1(config.encode('utf-8')).hexdigest()
+        if config_hash not in self._deltas:
+            if self._base_hash is None:
+                self._base_hash = config_hash
+                self._base_lines = config.split('\n')
+                self._matcher.set_seq2(self._base_lines)
+            self._store(config_hash, self._delta(config.split('\n')))
+        self._versions.append(config_hash)
+        self._references[config_hash] += 1
+        if self._max_size is not None:
+            while len(self._versions) > max(self._max_size, 1):
+                self._release(self._versions.pop(0))
+        if self._delta_lines > len(self._base_lines):  # the deltas are not smaller than a snapshot anymore
+            self._rebase(config_hash)
+
+    def truncate(self, size):
+        """Drops the versions newer than the first `size` versions."""
+        while len(self._versions) > size:
+            self._release(self._versions.pop())
 
 
 class PluribusConfig(object):
@@ -40,71 +188,246 @@ class PluribusConfig(object):
     store the history of configuration changes.
     """
 
-    def __init__(self, device):
+    def __init__(self, device, cache_ttl=None, initial_config='eager', max_history=None):
         self._device = device
         self._last_working_config = ''
         self._config_changed = False
         self._committed = False
-        self._config_history = list()
+        self._skipped_lines = 0
+        self._config_history = ConfigHistory(max_history)
+        self._cache_ttl = cache_ttl
+        self._running_config_cache = None  # (device write count, download time, running config)
+        self._model_cache = None  # (device write count, download time, RunningConfig)
+        self._initial_config_lock = threading.Lock()
+        self._initial_config_thread = None
+        self._initial_config_error = None
 
-        self._download_initial_config()
+        if initial_config == 'eager':
+            self._download_initial_config()
+        elif initial_config == 'background':
+            self._initial_config_thread = threading.Thread(target=self._download_initial_config_in_background)
+            self._initial_config_thread.daemon = True
+            self._initial_config_thread.start()
+        elif initial_config != 'lazy':
+            raise ValueError("initial_config must be one of: 'eager', 'lazy', 'background'.")
 
     def _download_initial_config(self):
         """Loads the initial config."""
-        _initial_config = self._download_running_config()  # this is a bit slow!
+        _initial_config = self._running_config()
         self._last_working_config = _initial_config
         self._config_history.append(_initial_config)
-        self._config_history.append(_initial_config)
 
+    def _download_initial_config_in_background(self):
+        """Loads the initial config; the error, if any, will be raised by the first configuration operation."""
+        try:
+            self._download_initial_config()
+        except Exception as downloaderr:  # pylint: disable=broad-except
+            self._initial_config_error = downloaderr
+
+    def _ensure_initial_config(self):
+        """
+        Makes sure the initial config is available, downloading it now if not downloaded yet, or waiting for the
+        download in background to finish. Must be called before any change of the configuration.
+        """
+        with self._initial_config_lock:
+            if self._initial_config_thread is not None:
+                self._initial_config_thread.join()
+                self._initial_config_thread = None
+                error, self._initial_config_error = self._initial_config_error, None
+                if error is not None:
+                    raise error  # the next operation will try once again
+            if not self._config_history:
+                self._download_initial_config()
+
+    @_span('download_running_config')
     def _download_running_config(self):
         """Downloads the running config from the switch."""
-        return self._device.show('running config')
+        # not through the show cache of the device: the copy is cached here, with its own TTL
+        return self._device.cli('running-config-show parsable-delim ;')  # this is a bit slow!
+
+    def _running_config(self, refresh=False):
+        """
+        Returns the running config, downloading it only when the cached copy is not valid anymore: a command other
+        than show-type has been executed through the device since the download, or the copy is older than the TTL.
+        With refresh, the running config is downloaded anyway: it may have been changed by other means.
+        """
+        write_count = self._device.write_count
+        if self._running_config_cache is not None and not refresh:
+            cached_write_count, cached_time, running_config = self._running_config_cache
+            if self._is_fresh(cached_write_count, cached_time):
+                return running_config
+        running_config = self._download_running_config()
+        self._running_config_cache = (write_count, time.time(), running_config)
+        if refresh:
+            self._model_cache = None  # built from the previous copy
+        return running_config
+
+    def _is_fresh(self, cached_write_count, cached_time):
+        """Tells if a copy of the running config is still valid."""
+        return cached_write_count == self._device.write_count and \
+            (self._cache_ttl is None or time.time() - cached_time < self._cache_ttl)
+
+    def invalidate_cache(self):
+        """
+        Drops the cached copy of the running config, and the outputs cached by the show cache of the device, if any;
+        the next operation will download it again.
+        Useful when the configuration is changed by other means than this object.
+        """
+        self._running_config_cache = None
+        self._model_cache = None
+        if self._device.show_cache is not None:
+            self._device.show_cache.clear()
+
+    def model(self):
+        """
+        Returns the running config parsed and indexed by object type, identifier, name and port.
+        The model is built once per download of the running config, then updated with the lines loaded through this
+        object, thus it is not downloaded and parsed again after every change.
+
+        :return: pyPluribus.model.RunningConfig
+
+        Example:
+
+        .. code-block:: python
+
+            >>> device.config.model().exists('vlan', 'id', 100)
+            True
+            >>> [trunk.key for trunk in device.config.model().on_port(4, 'trunk')]
+            [('name', 'core05.scl01')]
+        """
+        if self._model_cache is not None:
+            cached_write_count, cached_time, model = self._model_cache
+            if self._is_fresh(cached_write_count, cached_time):
+                return model
+        running_config = self._running_config()
+        cached_write_count, cached_time, _ = self._running_config_cache
+        model = RunningConfig(running_config)
+        self._model_cache = (cached_write_count, cached_time, model)
+        return model
+
+    def _update_model(self, command, write_count):
+        """
+        Updates the model with a command executed successfully, if the model was up to date before the command.
+        Returns the number of commands other than show-type executed so far by the device.
+        """
+        current_write_count = self._device.write_count
+        if self._model_cache is not None and current_write_count != write_count:
+            cached_write_count, cached_time, model = self._model_cache
+            if cached_write_count == write_count and model.apply(command):
+                self._model_cache = (current_write_count, cached_time, model)
+            else:
+                self._model_cache = None
+        return current_write_count
+
+    def _is_unchanged(self, line):
+        """Tells if the line is already in the running config, thus executing it would not change anything."""
+        if not line.strip() or self._model_cache is None:
+            return False
+        cached_write_count, cached_time, model = self._model_cache
+        return self._is_fresh(cached_write_count, cached_time) and line in model
+
+    def _upload_config_content(self, commands, rollbacked=False,  # pylint: disable=too-many-arguments
+                               skip_unchanged=False, progress=None, total=None):
+        """Will try to upload a specific configuration on the device: iterable of commands, consumed lazily."""
+        skip = None
+        if skip_unchanged:
+            # the running config may have been changed by other means since the last download: downloaded again
+            self._running_config(refresh=True)
+            self.model()  # the lines are checked against the model, updated after every line executed
+            skip = self._is_unchanged
+        self._skipped_lines = 0
+        applied = 0
+        started = time.time()
+        write_count = self._device.write_count
+        executing = [None]  # the command whose output is yielded by cli_batch()
+
+        def _track(commands):
+            """Remembers the command being executed."""
+            for command in commands:
+                executing[0] = command
+                yield command
 
-    def _upload_config_content(self, configuration, rollbacked=False):
-        """Will try to upload a specific configuration on the device."""
         try:
-            for configuration_line in configuration.splitlines():
-                self._device.cli(configuration_line)
+            for cli_output in self._device.cli_batch(_track(commands), skip=skip):
+                if cli_output is None:
+                    self._skipped_lines += 1
+                else:
+                    applied += 1
+                    write_count = self._update_model(executing[0], write_count)
+                if progress is not None:
+                    progress(_load_progress(applied, self._skipped_lines, total, started))
             self._config_changed = True  # configuration was changed
             self._committed = False  # and not committed yet
-        except (pyPluribus.exceptions.CommandExecutionError,
-                pyPluribus.exceptions.TimeoutError) as clierr:
+        except pyPluribus.exceptions.BatchExecutionError as clierr:
             if not rollbacked:
                 # rollack errors will just trow
                 # to avoid loops
                 self.discard()
             raise pyPluribus.exceptions.ConfigLoadError("Unable to upload config on the device: {err}.\
-                Configuration will be discarded.".format(err=clierr.message))
+                Configuration will be discarded.".format(err=clierr))
         return True
 
     def changed(self):  # pylint: disable=no-self-use
         """Returns if the configuration changes loaded had actually any effect on running config on the device"""
-        return self._config_changed and self.compare()
+        return self._config_changed and bool(self.compare(structured=True))
 
     def committed(self):  # pylint: disable=no-self-use
         """Returns if the configuration was committed"""
         return self._committed
 
-    def load_candidate(self, filename=None, config=None):
+    def skipped(self):
+        """Returns the number of lines of the last configuration loaded which were not sent, being already running"""
+        return self._skipped_lines
+
+    @_span('load_candidate')
+    def load_candidate(self, filename=None, config=None, skip_unchanged=False,  # pylint: disable=too-many-arguments
+                       coalesce=False, progress=None):
         """
         Loads a candidate configuration on the device.
         In case the load fails at any point, will automatically rollback to last working configuration.
 
         :param filename: Specifies the name of the file with the configuration content.
         :param config: New configuration to be uploaded on the device.
+        :param skip_unchanged: Does not send the lines already present in the running config, downloaded again before
+            the load. The number of lines skipped is returned by skipped(). Default: False
+        :param coalesce: Compiles the configuration into fewer commands before sending it, see
+            pyPluribus.objects.compile_config(). The line numbers in errors refer then to the compiled configuration.
+            Default: False
+        :param progress: Callable receiving a LoadProgress after every line: lines applied and skipped so far, total
+            number of lines, seconds elapsed, lines per second and the estimated number of seconds remaining.
+            The lines are counted before being sent: the file is read twice, and compiled twice when coalescing.
         :raise pyPluribus.exceptions.ConfigLoadError: When the configuration could not be uploaded to the device.
         """
 
-        configuration = ''
+        self._ensure_initial_config()
 
         if filename is None:
-            configuration = config
-        else:
-            with open(filename) as config_file:
-                configuration = config_file.read()
+            return self._load_lines(config.splitlines(), skip_unchanged, coalesce, progress)
+        with open(filename) as config_file:  # the file is read line by line, as the lines are sent
+            return self._load_lines(config_file, skip_unchanged, coalesce, progress)
 
-        return self._upload_config_content(configuration)
+    def _load_lines(self, lines, skip_unchanged, coalesce, progress):
+        """
+        Loads the lines of a candidate configuration: list or file.
+        With a progress callable, the lines are counted first, to estimate the time remaining: a list is compiled
+        once and kept in memory, a file is read again from the beginning, thus never kept in memory.
+        """
+        total = None
+        commands = _candidate_commands(lines, coalesce)
+        if progress is not None:
+            if hasattr(lines, 'seek'):
+                total = sum(1 for _ in commands)
+                lines.seek(0)
+                commands = _candidate_commands(lines, coalesce)
+            else:
+                commands = list(commands)
+                total = len(commands)
+        return self._upload_config_content(commands,
+                                           skip_unchanged=skip_unchanged,
+                                           progress=progress,
+                                           total=total)
 
+    @_span('discard')
     def discard(self):  # pylint: disable=no-self-use
         """
         Clears uncommited changes.
@@ -117,10 +440,12 @@ class PluribusConfig(object):
             raise pyPluribus.exceptions.ConfigurationDiscardError("Cannot discard configuration: {err}.\
                 ".format(err=rbackerr))
 
+    @_span('commit')
     def commit(self):  # pylint: disable=no-self-use
         """Will commit the changes on the device"""
+        self._ensure_initial_config()
         if self._config_changed:
-            self._last_working_config = self._download_running_config()
+            self._last_working_config = self._running_config()
             self._config_history.append(self._last_working_config)
             self._committed = True  # comfiguration was committed
             self._config_changed = False  # no changes since last commit :)
@@ -129,19 +454,28 @@ class PluribusConfig(object):
         self._committed = False  # make sure the _committed attribute is not True by any chance
         return False  # nothing to commit
 
-    def compare(self):  # pylint: disable=no-self-use
+    @_span('compare')
+    def compare(self, structured=False):  # pylint: disable=no-self-use
         """
         Computes the difference between the candidate config and the running config.
+
+        :param structured: Returns the changes by object, ignoring the order of the lines. Default: False
+        :return: Text diff or, when structured, pyPluribus.objects.ConfigDiff from the last committed config to the
+            running config: objects added, removed or changed, and the text diff
         """
         # becuase we emulate the configuration history
         # the difference is between the last committed config and the running-config
-        running_config = self._download_running_config()
+        self._ensure_initial_config()
+        running_config = self._running_config()
+        if structured:
+            return pyPluribus.objects.ConfigDiff(self._last_working_config, running_config)
         running_config_lines = running_config.splitlines()
         last_committed_config = self._last_working_config
         last_committed_config_lines = last_committed_config.splitlines()
         difference = difflib.unified_diff(running_config_lines, last_committed_config_lines, n=0)
         return '\n'.join(difference)
 
+    @_span('rollback')
     def rollback(self, number=0):
         """
         Will rollback the configuration to a previous state.
@@ -152,24 +486,27 @@ class PluribusConfig(object):
         """
         if number < 0:
             raise pyPluribus.exceptions.RollbackError("Please provide a positive number to rollback to!")
+        self._ensure_initial_config()
         available_configs = len(self._config_history)
-        max_rollbacks = available_configs - 2
+        max_rollbacks = available_configs - 1
         if max_rollbacks < 0:
             raise pyPluribus.exceptions.RollbackError("Cannot rollback: \
                 not enough configration history available!")
         if max_rollbacks > 0 and number > max_rollbacks:
             raise pyPluribus.exceptions.RollbackError("Cannot rollback more than {cfgs} configurations!\
                 ".format(cfgs=max_rollbacks))
-        config_location = 1  # will load the initial config worst case (user never commited, but wants to discard)
+        config_location = 0  # will load the initial config worst case (user never commited, but wants to discard)
         if max_rollbacks > 0:  # in case of previous commit(s) will be able to load a specific configuration
             config_location = available_configs - number - 1  # stored in location len() - rollabck_nb - 1
             # covers also the case of discard uncommitted changes (rollback 0)
         desired_config = self._config_history[config_location]
+        # only the objects changed since the desired config are touched, compared to the config actually running
+        commands = pyPluribus.objects.reconcile(self._running_config(refresh=True), desired_config)
         try:
-            self._upload_config_content(desired_config, rollbacked=True)
+            self._upload_config_content(commands, rollbacked=True)
         except pyPluribus.exceptions.ConfigLoadError as loaderr:
             raise pyPluribus.exceptions.RollbackError("Cannot rollback: {err}".format(err=loaderr))
-        del self._config_history[(config_location+1):]  # delete all newer configurations than the config rolled back
+        self._config_history.truncate(config_location+1)  # delete all newer configurations than the config rolled back
         self._last_working_config = desired_config
         self._committed = True
         self._config_changed = False
@@ -20,22 +20,341 @@ PluribusConfig class, in config.py file.
 """
 
 from __future__ import absolute_import
-from socket import error as socket_error
-from socket import gaierror as socket_gaierror
+import codecs
+import itertools
+import re
+import threading
+import time
+from socket import timeout as socket_timeout
 
-# third party libs
-import paramiko
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
 
 # local modules
 import pyPluribus.exceptions
+import pyPluribus.parsers
 from pyPluribus.config import PluribusConfig
+from pyPluribus.instrumentation import command_timer
+from pyPluribus.transport import get_backend, session_errors
+
+
+_RELOGIN_MESSAGE = 'Please enter username and password:'
+_SHELL_PROMPT = re.compile(r'CLI \([^()\n]*\) > $')  # e.g.: CLI (network-admin@sw01) >
+_RECV_SIZE = 32768
+_BULK_RECV_SIZE = 1048576  # when the whole output is read at once: everything received so far, in one call
+_STDERR_POLL_INTERVAL = 0.1  # seconds waiting for stdout before checking stderr again
+_MAX_RECONNECT_BACKOFF = 30  # seconds
+_SESSION_POLL_INTERVAL = 0.05  # seconds between two attempts to open a session ahead, while `max_sessions` are open
+
+
+class _SessionPrefetcher(object):
+
+    """Opens SSH sessions ahead, in a background thread, on the transport of a device."""
+
+    def __init__(self, device, window):
+        self._device = device
+        if device._max_sessions:  # pylint: disable=protected-access
+            # the sessions waiting in the queue must leave room for the one being used
+            window = min(window, device._max_sessions)  # pylint: disable=protected-access
+        self._sessions = queue.Queue(maxsize=max(window - 1, 1))
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._prefetch)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _prefetch(self):
+        """Keeps the queue filled with open sessions, until stopped or not able to open a new session."""
+        while not self._stopped.is_set():
+            try:
+                # the sessions may be all taken, e.g. by the other devices sharing the connection: stop() must not wait
+                ssh_session = self._device._open_session(self._stopped)  # pylint: disable=protected-access
+            except Exception as sesserr:  # pylint: disable=broad-except
+                ssh_session = sesserr  # will be raised in the consumer thread
+            if ssh_session is None:  # stopped while waiting
+                return
+            while not self._stopped.is_set():
+                try:
+                    self._sessions.put(ssh_session, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            else:
+                self._close(ssh_session)
+            if isinstance(ssh_session, Exception):
+                return
+
+    def get(self):
+        """Returns the next open session."""
+        ssh_session = self._sessions.get()
+        if isinstance(ssh_session, Exception):
+            raise ssh_session
+        return ssh_session
+
+    def stop(self):
+        """Stops the background thread and closes the sessions that have not been used."""
+        self._stopped.set()
+        self._thread.join()
+        while True:
+            try:
+                self._close(self._sessions.get_nowait())
+            except queue.Empty:
+                break
+
+    def _close(self, ssh_session):
+        """Closes a session opened but not used."""
+        if not isinstance(ssh_session, Exception):
+            self._device._close_session(ssh_session)  # pylint: disable=protected-access
+
+
+def _is_show_command(command):
+    """Tells if the command only displays data, without changing anything on the device."""
+    command_tokens = command.split()
+    return bool(command_tokens) and command_tokens[0].endswith('-show')
+
+
+def _normalize_show_command(command):
+    """Builds the show command from its human-readable format, e.g.: `switch info` -> `switch-info-show`."""
+    if not command.endswith('-show'):
+        command += '-show'
+    return command.replace(' ', '-')
+
+
+def _format_show_command(show_command, delim, options=None):
+    """Requests parsable output from a show command."""
+    if not show_command.endswith('-show'):
+        raise pyPluribus.exceptions.CommandExecutionError('All show commands must end with "-show"!')
+
+    if not delim or delim is None:
+        delim = ';'
+
+    if options:
+        show_command = '{command} {options}'.format(command=show_command, options=options)
+
+    return '{command} parsable-delim {delim}'.format(
+        command=show_command,
+        delim=delim
+    )
+
+
+def _recv_or_timeout(recv, size):
+    """Receives from a SSH session, raising pyPluribus.exceptions.TimeoutError when the session times out."""
+    try:
+        return recv(size)
+    except socket_timeout:
+        raise pyPluribus.exceptions.TimeoutError('The device did not send the output in time.')
+
+
+def _iter_lines(recv, end_marker=None):
+    """
+    Yields the lines received, decoded, as soon as they are complete.
+    When `end_marker` is specified, stops when the marker is received at the end of the output, instead of EOF.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    pending = ''
+    while True:
+        byte_output = recv(_RECV_SIZE)
+        if not byte_output:
+            if end_marker is not None:
+                raise _ShellClosedError('Shell closed by the device.')
+            pending += decoder.decode(b'', True)
+            break
+        lines = (pending + decoder.decode(byte_output)).split('\n')
+        pending = lines.pop()  # not complete yet
+        for line in lines:
+            yield line.rstrip('\r')
+        if end_marker is not None and pending.endswith(end_marker):
+            pending = pending[:-len(end_marker)]
+            break
+    if pending:
+        yield pending
+
+
+def _split_lines(output):
+    """Splits a whole output in lines, the same way _iter_lines() does while receiving it."""
+    lines = output.split('\n')
+    last_line = lines.pop()  # not terminated by a newline, kept as it is
+    if '\r' in output:
+        lines = [line.rstrip('\r') for line in lines]
+    if last_line:
+        lines.append(last_line)
+    return lines
+
+
+def _strip_banner(output):
+    """
+    Drops the first line of a whole output, the banner. Returns the same as joining the lines yielded by
+    _iter_lines() after the first one, without splitting the output when possible.
+    """
+    if '\r' in output:
+        return '\n'.join(_split_lines(output)[1:])
+    output = output.partition('\n')[2]
+    if output.endswith('\n'):
+        return output[:-1]
+    return output
+
+
+def _read_all(recv, size=_RECV_SIZE):
+    """Reads everything till EOF, then decodes it, once."""
+    chunks = []
+    byte_output = recv(size)
+    while byte_output:
+        chunks.append(byte_output)
+        byte_output = recv(size)
+    return b''.join(chunks).decode('utf-8', 'replace')  # the size is computed first: one allocation, one copy
+
+
+class _ChannelReader(object):
+
+    """
+    Reads the output of a command executed in a SSH session. The data received on stderr is drained while waiting
+    for stdout, thus the device never stops sending because the stderr window is full.
+    """
+
+    def __init__(self, ssh_session, timeout):
+        self._session = ssh_session
+        self._timeout = timeout
+        self._err_chunks = []
+        ssh_session.settimeout(_STDERR_POLL_INTERVAL)  # the timeout of the command is checked by recv()
+
+    def _drain_stderr(self):
+        """Keeps what has been received on stderr so far."""
+        while self._session.recv_stderr_ready():
+            self._err_chunks.append(self._session.recv_stderr(_BULK_RECV_SIZE))
+
+    def recv(self, size):
+        """Receives from stdout, at most `size` bytes; returns b'' at EOF."""
+        waited = 0.0
+        while True:
+            self._drain_stderr()
+            try:
+                return self._session.recv(size)
+            except socket_timeout:
+                waited += _STDERR_POLL_INTERVAL
+                if self._timeout is not None and waited >= self._timeout:
+                    raise pyPluribus.exceptions.TimeoutError('The device did not send the output in time.')
+
+    def err_output(self):
+        """Returns what has been received on stderr, decoded."""
+        self._drain_stderr()
+        return b''.join(self._err_chunks).decode('utf-8', 'replace')
+
+
+class _Flight(object):
+
+    """A command in progress, whose output is shared by all the callers waiting for it."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._output = None
+        self._error = None
+
+    @property
+    def done(self):
+        """Tells if the command finished."""
+        return self._done.is_set()
+
+    def finish(self, output=None, error=None):
+        """Sets the output, or the error, and wakes the callers waiting."""
+        self._output = output
+        self._error = error
+        self._done.set()
+
+    def wait(self):
+        """Waits for the command to finish; returns its output or raises its error."""
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._output
+
+
+class _ShellClosedError(Exception):
+    """Raised when the persistent shell is not usable anymore."""
+    pass
+
+
+class _PersistentShell(object):
+
+    """
+    Long-lived interactive session with the CLI.
+    The output of each command is delimited by the prompt the CLI prints when ready for the next command.
+    No PTY is requested, thus the errors are still sent separately, on stderr.
+    """
+
+    def __init__(self, ssh_session):
+        self._session = ssh_session
+        self._session.invoke_shell()
+        self._prompt = None
+        banner_and_prompt = self._read_until(lambda tail: _SHELL_PROMPT.search(tail) is not None)
+        self._prompt = _SHELL_PROMPT.search(banner_and_prompt).group(0)
+        self._drain_stderr()
+
+    def _recv(self, size):
+        """Receives from the shell, raising _ShellClosedError when the shell is not usable anymore."""
+        try:
+            return _recv_or_timeout(self._session.recv, size)
+        except session_errors() as shellerr:
+            raise _ShellClosedError(shellerr)
+
+    def _read_until(self, complete):
+        """Reads from the session till complete() returns True for the last characters received."""
+        decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        chunks = []
+        tail = ''
+        while not complete(tail):
+            byte_output = self._recv(_RECV_SIZE)
+            if not byte_output:
+                raise _ShellClosedError('Shell closed by the device.')
+            output = decoder.decode(byte_output)
+            chunks.append(output)
+            tail = (tail + output)[-256:]
+        return ''.join(chunks)
+
+    def _drain_stderr(self):
+        """Returns what has been received on stderr so far."""
+        err_output = []
+        while self._session.recv_stderr_ready():
+            err_output.append(self._session.recv_stderr(_RECV_SIZE).decode('utf-8', 'replace'))
+        return ''.join(err_output)
+
+    def send(self, command):
+        """Sends a command to the CLI."""
+        try:
+            self._session.sendall('{command}\n'.format(command=command).encode('utf-8'))
+        except session_errors() as shellerr:
+            raise _ShellClosedError(shellerr)
+
+    def iter_output(self, timer=None):
+        """
+        Yields the lines of the output of the command sent, till the CLI prints the prompt again.
+        The bytes received are counted by the timer of the command, if specified.
+        """
+        lines_read = False
+        recv = self._recv if timer is None else timer.count(self._recv)
+        for line in _iter_lines(recv, self._prompt):
+            lines_read = True
+            yield line
+        # whatever was sent on stderr before the prompt is the error of this command
+        err_output = self._drain_stderr()
+        if not lines_read:
+            if err_output:
+                raise pyPluribus.exceptions.CommandExecutionError(err_output)
+
+    def close(self):
+        """Closes the shell."""
+        self._session.close()
 
 
 class PluribusDevice(object):  # pylint: disable=too-many-instance-attributes
 
     """Connection establishment and basic interaction with a Pluribus device."""
 
-    def __init__(self, hostname, username, password, port=22, timeout=60, keepalive=60):
+    def __init__(self, hostname, username, password, port=22, timeout=60,  # pylint: disable=too-many-arguments
+                 keepalive=60, batch_window=1, persistent_shell=False, max_sessions=10, config_cache_ttl=None,
+                 initial_config='lazy', max_config_history=None, instrumentation=None, show_cache=None,
+                 single_flight=True, reconnect_attempts=3, reconnect_backoff=1.0, transport_registry=None,
+                 transport='paramiko', transport_options=None):
 
         self._hostname = hostname
         self._username = username
@@ -43,39 +362,155 @@ class PluribusDevice(object):  # pylint: disable=too-many-instance-attributes
         self._port = port
         self._timeout = timeout
         self._keepalive = keepalive
+        self._batch_window = batch_window
+        self._persistent_shell = persistent_shell
+        self._max_sessions = max_sessions
+        self._config_cache_ttl = config_cache_ttl
+        self._initial_config = initial_config
+        self._max_config_history = max_config_history
+        self._instrumentation = instrumentation
+        self._show_cache = show_cache
+        self._single_flight = single_flight
+        self._reconnect_attempts = reconnect_attempts
+        self._reconnect_backoff = reconnect_backoff
+        self._transport_registry = transport_registry
+        self._transport = get_backend(transport)
+        self._transport_options = dict(transport_options or {})
+        self._flights = {}  # (command, write count) -> _Flight
+        self._flights_lock = threading.Lock()
+        self._write_count = 0
+        self._write_count_lock = threading.Lock()
 
         self._ssh_banner = 'Connected to Switch {hostname};'.format(
             hostname=self._hostname
         )
         self._connection = None
+        self._shell = None
+        self._shell_lock = threading.Lock()
+        self._connection_lock = threading.RLock()
+        self._sessions = None
+        if transport_registry is not None:
+            # the connection is shared with other devices: so is the limit
+            self._sessions = transport_registry.session_limit(self._transport_key, max_sessions)
+        elif max_sessions:
+            # the SSH server limits the number of sessions per connection (MaxSessions: 10 by default on OpenSSH)
+            self._sessions = threading.BoundedSemaphore(max_sessions)
 
         self.connected = False
         self.config = None
 
+    @property
+    def hostname(self):
+        """Hostname of the device."""
+        return self._hostname
+
+    @property
+    def _transport_key(self):
+        """The devices having the same key can share the SSH connection."""
+        return (self._hostname, self._port, self._username)
+
+    @property
+    def instrumentation(self):
+        """The pyPluribus.instrumentation.Instrumentation receiving the metrics, or None."""
+        return self._instrumentation
+
+    @property
+    def show_cache(self):
+        """The pyPluribus.cache.ShowCache of the outputs of the show commands, or None."""
+        return self._show_cache
+
+    @property
+    def write_count(self):
+        """
+        Counter of the changes: increased when a command other than show-type is sent, and again when its
+        execution finishes, thus by 2 per command; odd while a single command is in progress.
+        Anything read from the device while this number changed might not be accurate anymore, including what was
+        read while a command was in progress.
+        """
+        return self._write_count
+
+    def _before_write(self, command):
+        """The initial config must be downloaded before the first change."""
+        if self.config is not None and not _is_show_command(command):
+            self.config._ensure_initial_config()  # pylint: disable=protected-access
+
+    def _count_write(self, command):
+        """Counts the commands which may change the configuration: called before and after the execution."""
+        if not _is_show_command(command):
+            with self._write_count_lock:
+                self._write_count += 1
+
     # ---- Connection management -------------------------------------------------------------------------------------->
 
+    def _connect(self):
+        """Establishes the connection with the device, using the transport backend. Returns the Transport."""
+        connection = self._transport(self._hostname, self._port, self._username, self._password,
+                                     timeout=self._timeout, keepalive=self._keepalive, **self._transport_options)
+        connection.connect()
+        return connection
+
+    def _acquire_connection(self):
+        """Returns the connection: a new one, or the one shared through the transport registry."""
+        if self._transport_registry is None:
+            return self._connect()
+        return self._transport_registry.acquire(self._transport_key, self._password, self._connect)
+
+    def _release_connection(self, connection, reusable=True):
+        """Closes the connection, or gives it back to the transport registry."""
+        if self._transport_registry is None:
+            connection.close()
+        else:
+            self._transport_registry.release(connection, reusable=reusable)
+
     def open(self):
         """Opens a SSH connection with a Pluribus machine."""
-        self._connection = paramiko.SSHClient()
-        self._connection.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        try:
-            self._connection.connect(hostname=self._hostname,
-                                     username=self._username,
-                                     password=self._password,
-                                     timeout=self._timeout,
-                                     port=self._port)
-            self._connection.get_transport().set_keepalive(self._keepalive)
-            self.connected = True
-            self.config = PluribusConfig(self)
-        except paramiko.ssh_exception.AuthenticationException:
-            raise pyPluribus.exceptions.ConnectionError("Unable to open connection with {hostname}: \
-                invalid credentials!".format(hostname=self._hostname))
-        except socket_error as sockerr:
-            raise pyPluribus.exceptions.ConnectionError("Cannot open connection: {skterr}. \
-                Wrong port?".format(skterr=sockerr.message))
-        except socket_gaierror as sockgai:
-            raise pyPluribus.exceptions.ConnectionError("Cannot open connection: {gaierr}. \
-                Wrong hostname?".format(gaierr=sockgai.message))
+        self._close_shell()  # the shell belongs to the previous connection, if any
+        self._connection = self._acquire_connection()
+        self.connected = True
+        self.config = PluribusConfig(self,
+                                     cache_ttl=self._config_cache_ttl,
+                                     initial_config=self._initial_config,
+                                     max_history=self._max_config_history)
+
+    def reconnect(self):
+        """
+        Opens the SSH connection again, keeping the configuration object: the history of the configuration, the
+        changes not committed yet and the copy of the running config are preserved, nothing is downloaded again.
+        Retries `reconnect_attempts` times, waiting between the attempts: `reconnect_backoff` seconds, doubled after
+        each attempt, at most 30 seconds.
+
+        :raise pyPluribus.exceptions.ConnectionError: when the connection cannot be opened again
+        """
+        if self.config is None:  # never opened, or closed
+            return self.open()
+        self._reconnect(self._connection)
+
+    def _reconnect(self, connection):
+        """Opens the SSH connection again, unless already reopened by another thread. See reconnect()."""
+        with self._connection_lock:
+            if self._connection is not connection:
+                return
+            self._close_shell()
+            if connection is not None and self._transport_registry is not None:
+                self._transport_registry.invalidate(connection)  # not given to the other devices anymore
+            error = None
+            for attempt in range(max(self._reconnect_attempts, 1)):
+                if attempt:
+                    time.sleep(min(self._reconnect_backoff * 2 ** (attempt - 1), _MAX_RECONNECT_BACKOFF))
+                try:
+                    self._connection = self._acquire_connection()
+                    self.connected = True
+                    error = None
+                    break
+                except pyPluribus.exceptions.ConnectionError as connerr:
+                    error = connerr
+            if connection is not None:
+                # the sessions still open on it, if any, fail; a shared connection is closed when released by all
+                self._release_connection(connection, reusable=False)
+            if error is not None:
+                self._connection = None
+                self.connected = False
+                raise error
 
     def close(self):
         """Closes the SSH connection if the connection is UP."""
@@ -88,13 +523,224 @@ class PluribusDevice(object):  # pylint: disable=too-many-instance-attributes
                 except pyPluribus.exceptions.ConfigurationDiscardError as discarderr:  # bad luck.
                     raise pyPluribus.exceptions.ConnectionError("Could not discard the configuration: \
                         {err}".format(err=discarderr))
-        self._connection.close()  # close SSH connection
+        self._close_shell()
+        self._release_connection(self._connection)  # close SSH connection, unless shared with other devices
         self.config = None  # reset config object
         self._connection = None  #
         self.connected = False
 
+    def login_attempts(self):
+        """
+        Yields the number of each attempt to execute a command, at most `reconnect_attempts` + 1. When the device
+        asks to log in again, the caller goes on with the next attempt: the connection is opened again meanwhile,
+        unless already reopened by another thread. Blocking.
+
+        Example:
+
+        .. code-block:: python
+
+            for _ in device.login_attempts():
+                output = execute(command)
+                if output != 'Please enter username and password:':
+                    return output
+        """
+        for attempt in range(self._reconnect_attempts + 1):
+            connection = self._connection
+            yield attempt
+            self._reconnect(connection)  # rare cases when connection is lost :(
+
     # <--- Connection management ---------------------------------------------------------------------------------------
 
+    # ---- Sessions of the wrappers ----------------------------------------------------------------------------------->
+
+    def open_command_session(self, command):
+        """
+        Opens a session for a command executed by a wrapper of the device, e.g. AsyncPluribusDevice, reading the
+        output by its own means. The initial config is downloaded before the first change, the session waits while
+        `max_sessions` sessions are open and the command is counted as a change if not show-type, as when executed
+        through cli(). Blocking.
+
+        :param command: Command to be executed in the session.
+        :return: Session of the transport, to be closed using close_command_session() once the output is read.
+        """
+        self._before_write(command)
+        ssh_session = self._open_session()
+        self._count_write(command)
+        return ssh_session
+
+    def close_command_session(self, ssh_session, command):
+        """
+        Closes a session opened using open_command_session(), once the output of the command is read.
+
+        :param ssh_session: Session returned by open_command_session().
+        :param command: Command executed in the session.
+        """
+        self._close_session(ssh_session)
+        self._count_write(command)
+
+    # <--- Sessions of the wrappers ------------------------------------------------------------------------------------
+
+    def _open_session(self, stopped=None):
+        """
+        Opens a new SSH session on the existing transport. Waits while `max_sessions` sessions are open, or till
+        the `stopped` event, if specified, is set: then returns None.
+        """
+        if self._sessions is not None:
+            if stopped is None:
+                self._sessions.acquire()
+            else:
+                while not self._sessions.acquire(False):
+                    if stopped.wait(_SESSION_POLL_INTERVAL):
+                        return None
+        try:
+            ssh_session = self._connection.open_session()  # opens a new SSH session
+        except Exception:
+            self._release_session()
+            raise
+        ssh_session.settimeout(self._timeout)
+        return ssh_session
+
+    def _release_session(self):
+        """Makes room for a new session."""
+        if self._sessions is not None:
+            self._sessions.release()
+
+    def _close_session(self, ssh_session):
+        """Closes a session opened using _open_session()."""
+        ssh_session.close()
+        self._release_session()
+
+    def _open_timed_session(self, command, open_session=None):
+        """
+        Opens a new session for a command, using open_session(), by default _open_session().
+        Returns the session and the timer of the command.
+        """
+        timer = command_timer(self._instrumentation, command)
+        try:
+            ssh_session = (open_session or self._open_session)()
+        except Exception as sesserr:
+            timer.finish(sesserr)
+            raise
+        timer.phase('session_open')
+        return ssh_session, timer
+
+    def _session_iter(self, command, open_session=None):
+        """Executes a command in a new session and yields the lines of the output, without banner."""
+        ssh_session, timer = self._open_timed_session(command, open_session)
+        return self._execute_iter(ssh_session, command, timer)
+
+    def _session_output(self, command, open_session=None):
+        """Executes a command in a new session and returns the whole output, without banner."""
+        ssh_session, timer = self._open_timed_session(command, open_session)
+        return self._execute(ssh_session, command, timer)
+
+    def _execute_iter(self, ssh_session, command, timer):
+        """Executes a command on an already open SSH session and yields the lines of the output, without banner."""
+        self._count_write(command)
+        error = None
+        try:
+            reader = _ChannelReader(ssh_session, self._timeout)
+            ssh_session.exec_command(command)
+            timer.phase('exec')
+            lines = _iter_lines(timer.count(reader.recv))
+            if next(lines, None) is None:  # no output at all, not even the banner line
+                err_output = reader.err_output()
+                if err_output:
+                    raise pyPluribus.exceptions.CommandExecutionError(err_output)
+            for line in lines:
+                yield line
+        except Exception as execerr:
+            error = execerr
+            raise
+        finally:
+            self._close_session(ssh_session)
+            self._count_write(command)  # reading while the command was executed is not accurate either
+            timer.finish(error)
+
+    def _execute(self, ssh_session, command, timer):
+        """
+        Executes a command on an already open SSH session and returns the whole output, without banner.
+        The output is received in large chunks and decoded once, instead of line by line.
+        """
+        self._count_write(command)
+        error = None
+        try:
+            reader = _ChannelReader(ssh_session, self._timeout)
+            ssh_session.exec_command(command)
+            timer.phase('exec')
+            output = _read_all(timer.count(reader.recv), _BULK_RECV_SIZE)
+            if not output:  # no output at all, not even the banner line
+                err_output = reader.err_output()
+                if err_output:
+                    raise pyPluribus.exceptions.CommandExecutionError(err_output)
+            return _strip_banner(output)
+        except Exception as execerr:
+            error = execerr
+            raise
+        finally:
+            self._close_session(ssh_session)
+            self._count_write(command)  # reading while the command was executed is not accurate either
+            timer.finish(error)
+
+    def _close_shell(self):
+        """Closes the persistent shell, if open."""
+        if self._shell is not None:
+            self._shell.close()
+            self._shell = None
+            self._release_session()
+
+    def _shell_iter(self, command):
+        """
+        Executes a command in the persistent shell, opening the shell if not already open, and yields the lines
+        of the output. When the shell is not usable, the command is executed in a new session, but only if this is
+        safe: the command has not been sent yet, or it is a show command.
+        """
+        if not self._shell_lock.acquire(False):  # the shell is busy with another command
+            for line in self._session_iter(command):
+                yield line
+            return
+        fallback = False
+        sent = False
+        lines_read = False
+        error = None
+        timer = command_timer(self._instrumentation, command)
+        self._count_write(command)
+        try:
+            if self._shell is None:
+                ssh_session = self._open_session()
+                try:
+                    self._shell = _PersistentShell(ssh_session)
+                except Exception:
+                    self._close_session(ssh_session)
+                    raise
+            timer.phase('session_open')
+            sent = True
+            self._shell.send(command)
+            timer.phase('exec')
+            for line in self._shell.iter_output(timer):
+                lines_read = True
+                yield line
+        except (_ShellClosedError, pyPluribus.exceptions.TimeoutError) + session_errors() as shellerr:
+            error = shellerr
+            self._close_shell()  # the output of the shell is not reliable anymore
+            if lines_read or (sent and not _is_show_command(command)):
+                raise pyPluribus.exceptions.CommandExecutionError("Lost the shell while executing `{command}`: \
+                    {err}".format(command=command, err=shellerr))
+            fallback = True
+        except GeneratorExit:
+            self._close_shell()  # the rest of the output has not been read
+            raise
+        except Exception as shellerr:
+            error = shellerr
+            raise
+        finally:
+            self._shell_lock.release()
+            self._count_write(command)  # reading while the command was executed is not accurate either
+            timer.finish(error)
+        if fallback:
+            for line in self._session_iter(command):
+                yield line
+
     def cli(self, command):
         """
         Executes a command and returns raw output from the CLI.
@@ -110,43 +756,167 @@ class PluribusDevice(object):  # pylint: disable=too-many-instance-attributes
 
             device.cli('switch-poweroff')
         """
+        if self._persistent_shell:
+            return '\n'.join(self.cli_iter(command))
+
         if not self.connected:
             raise pyPluribus.exceptions.ConnectionError("Not connected to the deivce.")
 
-        cli_output = ''
+        self._before_write(command)
+        for _ in self.login_attempts():
+            cli_output = self._session_output(command)  # the whole output is read at once, then decoded
+            if cli_output != _RELOGIN_MESSAGE:
+                return cli_output
+        raise pyPluribus.exceptions.ConnectionError("The device asks to log in again after reconnecting.")
 
-        ssh_session = self._connection.get_transport().open_session()  # opens a new SSH session
-        ssh_session.settimeout(self._timeout)
+    def cli_iter(self, command):
+        """
+        Executes a command and yields the lines of the output as they are received from the CLI.
+        The output is never entirely held in memory, thus the lines can be processed before the command finishes.
+
+        :param command: Command to be executed on the CLI.
+        :raise pyPluribus.exceptions.TimeoutError: when execution of the command exceeds the timeout
+        :raise pyPluribus.exceptions.CommandExecutionError: when not able to retrieve the output
+        :return: Generator of the lines of the output
 
-        ssh_session.exec_command(command)
+        CLI Example:
 
-        ssh_output = ''
-        err_output = ''
+        .. code-block:: python
 
-        ssh_output_makefile = ssh_session.makefile()
-        ssh_error_makefile = ssh_session.makefile_stderr()
+            for mac_entry in device.cli_iter('l2-table-show parsable-delim ;'):
+                print(mac_entry.split(';'))
+        """
+        if not self.connected:
+            raise pyPluribus.exceptions.ConnectionError("Not connected to the deivce.")
 
-        for byte_output in ssh_output_makefile:
-            ssh_output += byte_output
+        self._before_write(command)
+        for _ in self.login_attempts():
+            if self._persistent_shell:
+                lines = self._shell_iter(command)
+            else:
+                lines = self._session_iter(command)
+            first_lines = list(itertools.islice(lines, 2))
+            if first_lines != [_RELOGIN_MESSAGE]:
+                for line in itertools.chain(first_lines, lines):
+                    yield line
+                return
+        raise pyPluribus.exceptions.ConnectionError("The device asks to log in again after reconnecting.")
 
-        for byte_error in ssh_error_makefile:
-            err_output += byte_error
+    def cli_batch(self, commands, skip=None):
+        """
+        Executes a sequence of commands, in order, and yields raw output from the CLI for each of them.
+        When the device has been initialised with a `batch_window` greater than 1, the SSH sessions are opened
+        ahead, in background, on the same transport: while one command is executed, the sessions for the next
+        commands are already available, thus the channel setup is not paid by every command.
+        When the device uses a persistent shell, all the commands are sent over the shell instead.
 
-        if not ssh_output:
-            if err_output:
-                raise pyPluribus.exceptions.CommandExecutionError(err_output)
+        :param commands: Iterable of commands to be executed on the CLI.
+        :param skip: Callable receiving each command, right before its execution: the commands for which it returns
+            True are not executed, None being yielded instead of the output. Default: all commands are executed.
+        :raise pyPluribus.exceptions.BatchExecutionError: when one of the commands fails; the exception references
+            the line number (starting from 1) and the command which failed. The next commands are not executed.
+        :return: Generator of raw outputs, in the same order as the commands
 
-        cli_output = '\n'.join(ssh_output.split(self._ssh_banner)[-1].splitlines()[1:])
+        CLI Example:
 
-        if cli_output == 'Please enter username and password:':  # rare cases when connection is lost :(
-            self.open()  # retry to open connection
-            return self.cli(command)
+        .. code-block:: python
 
-        return cli_output
+            for output in device.cli_batch(['vlan-create id 100 scope local', 'vlan-port-add vlan-id 100 ports 4']):
+                print(output)
+        """
+        if not self.connected:
+            raise pyPluribus.exceptions.ConnectionError("Not connected to the deivce.")
+
+        if self.config is not None:
+            self.config._ensure_initial_config()  # pylint: disable=protected-access
+
+        sessions = None
+        try:
+            for line_number, command in enumerate(commands, 1):
+                if skip is not None and skip(command):
+                    yield None
+                    continue
+                try:
+                    if self._batch_window < 2 or self._persistent_shell:
+                        yield self.cli(command)
+                        continue
+                    if sessions is None:
+                        sessions = _SessionPrefetcher(self, self._batch_window)
+                    cli_output = self._session_output(command, sessions.get)
+                    if cli_output == _RELOGIN_MESSAGE:  # the prefetched sessions are not usable anymore
+                        sessions.stop()
+                        sessions = None
+                        cli_output = self.cli(command)  # will reopen the connection
+                    yield cli_output
+                except (pyPluribus.exceptions.CommandExecutionError,
+                        pyPluribus.exceptions.TimeoutError) as clierr:
+                    raise pyPluribus.exceptions.BatchExecutionError(
+                        "Line {line}: `{command}`: {err}".format(line=line_number, command=command, err=clierr),
+                        line_number,
+                        command
+                    )
+        finally:
+            if sessions is not None:
+                sessions.stop()
+
+    def run_many(self, commands, return_exceptions=False):
+        """
+        Executes several commands in parallel, each of them in its own session, over the same SSH transport.
+        At most `max_sessions` commands are executed at the same time; the others wait for a session to be closed.
+        The commands are independent one of each other: there is no guarantee regarding the order of execution.
+
+        :param commands: Iterable of commands to be executed on the CLI.
+        :param return_exceptions: When True, the exception raised by a command is returned in place of its output.
+            Otherwise, the first exception (in the order of the commands) is raised after all commands finished.
+        :raise pyPluribus.exceptions.TimeoutError: when execution of a command exceeds the timeout
+        :raise pyPluribus.exceptions.CommandExecutionError: when not able to retrieve the output of a command
+        :return: List of raw outputs, in the same order as the commands
+
+        CLI Example:
+
+        .. code-block:: python
+
+            vlans, trunks = device.run_many(['vlan-show parsable-delim ;', 'trunk-show parsable-delim ;'])
+        """
+        if not self.connected:
+            raise pyPluribus.exceptions.ConnectionError("Not connected to the deivce.")
+
+        commands = list(commands)
+        results = [None] * len(commands)
+        pending = queue.Queue()
+        for index, command in enumerate(commands):
+            pending.put((index, command))
+
+        def _worker():
+            """Executes the pending commands, one at a time."""
+            while True:
+                try:
+                    index, command = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    results[index] = self.cli(command)
+                except Exception as clierr:  # pylint: disable=broad-except
+                    results[index] = clierr
+
+        workers = [threading.Thread(target=_worker) for _ in range(min(len(commands), self._max_sessions or 10))]
+        for worker in workers:
+            worker.daemon = True
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
 
     def execute_show(self, show_command, delim=';'):
         """
         Executes show-type commands on the CLI and returns parsable output usinng ';' as delimitor.
+        When the same command is already executed by another thread, waits for it and returns the same output,
+        unless the device has been initialised with `single_flight=False`.
 
         :param show_command: Show command to be executed
         :param delim: Will use specific delimitor. Default: ';'
@@ -161,19 +931,46 @@ class PluribusDevice(object):  # pylint: disable=too-many-instance-attributes
             device.execute_show('switch-info-show')
             device.execute_show('node-show', '$$')
         """
+        command = _format_show_command(show_command, delim)
+        write_count = self._write_count
+        if self._show_cache is not None:
+            cli_output = self._show_cache.get(command, write_count)
+            if cli_output is not None:
+                return cli_output
+        if self._single_flight:
+            cli_output = self._execute_once(command, write_count)
+        else:
+            cli_output = self.cli(command)
+        if self._show_cache is not None:
+            self._show_cache.put(command, write_count, cli_output)
+        return cli_output
 
-        if not show_command.endswith('-show'):
-            raise pyPluribus.exceptions.CommandExecutionError('All show commands must end with "-show"!')
-
-        if not delim or delim is None:
-            delim = ';'
-
-        format_command = '{command} parsable-delim {delim}'.format(
-            command=show_command,
-            delim=delim
-        )
-
-        return self.cli(format_command)
+    def _execute_once(self, command, write_count):
+        """
+        Executes a show command, unless the same command is already in progress: then waits for it and returns the
+        same output. The commands started before a change of the configuration are not shared with the later callers.
+        """
+        key = (command, write_count)
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            return flight.wait()
+        try:
+            cli_output = self.cli(command)
+            flight.finish(cli_output)
+            return cli_output
+        except Exception as clierr:
+            flight.finish(error=clierr)
+            raise
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+            if not flight.done:  # interrupted
+                flight.finish(error=pyPluribus.exceptions.CommandExecutionError(
+                    'Interrupted while executing `{command}`'.format(command=command)))
 
     def show(self, command, delim=';'):
         """
@@ -192,9 +989,63 @@ class PluribusDevice(object):  # pylint: disable=too-many-instance-attributes
             device.show('switch-info')
             device.show('switch info')
         """
+        return self.execute_show(_normalize_show_command(command), delim)
+
+    def show_iter(self, command, delim=';'):
+        """
+        Executes show-type commands on the CLI and yields the lines of the parsable output as they are received.
+
+        :param command: Command to be executed
+        :param delim: Custom delimiter. Default value: ';'
+        :raise pyPluribus.exceptions.TimeoutError: when execution of the command exceeds the timeout
+        :raise pyPluribus.exceptions.CommandExecutionError: when not able to retrieve the output
+        :return: Generator of the lines of the parsable output
+
+        CLI Example:
+
+        .. code-block:: python
+
+            for mac_entry in device.show_iter('l2 table'):
+                print(mac_entry.split(';'))
+        """
+        return self.cli_iter(_format_show_command(_normalize_show_command(command), delim))
+
+    def show_records(self, command, columns=None, delim=';'):
+        """
+        Executes show-type commands on the CLI and returns the rows as records, keyed by the name of the columns.
+
+        :param command: Command to be executed
+        :param columns: Names of the columns to be retrieved. Default: all.
+        :param delim: Custom delimiter. Default value: ';'
+        :raise pyPluribus.exceptions.TimeoutError: when execution of the command exceeds the timeout
+        :raise pyPluribus.exceptions.CommandExecutionError: when not able to retrieve the output
+        :return: List of namedtuples, one class being generated per command (see pyPluribus.parsers)
+
+        CLI Example:
+
+        .. code-block:: python
+
+            for vlan in device.show_records('vlan'):
+                print(vlan.id, vlan.scope)
+            device.show_records('l2 table', columns=['mac', 'vlan', 'ports'])
+        """
+        return list(self.show_records_iter(command, columns, delim))
 
-        if not command.endswith('-show'):
-            command += '-show'
-        command = command.replace(' ', '-')
+    def show_records_iter(self, command, columns=None, delim=';'):
+        """
+        Same as show_records(), but yields the records as the rows are received from the CLI.
 
-        return self.execute_show(command, delim)
+        :param command: Command to be executed
+        :param columns: Names of the columns to be retrieved. Default: all.
+        :param delim: Custom delimiter. Default value: ';'
+        :raise pyPluribus.exceptions.TimeoutError: when execution of the command exceeds the timeout
+        :raise pyPluribus.exceptions.CommandExecutionError: when not able to retrieve the output
+        :return: Generator of namedtuples
+        """
+        show_command = _normalize_show_command(command)
+        if columns:
+            options = 'format {columns}'.format(columns=','.join(columns))
+        else:
+            options = 'format all show-headers'  # the names of the columns will be read from the header
+        lines = self.cli_iter(_format_show_command(show_command, delim, options))
+        return pyPluribus.parsers.parse_records(lines, show_command, columns, delim or ';')
@@ -28,6 +28,15 @@ class CommandExecutionError(Exception):
     pass
 
 
+class BatchExecutionError(CommandExecutionError):
+    """Raised when a command from a batch fails. Keeps the number of the line and the command that failed."""
+
+    def __init__(self, message, line_number, command):
+        super(BatchExecutionError, self).__init__(message)
+        self.line_number = line_number
+        self.command = command
+
+
 class ConnectionError(Exception):
     """Raised when the connection with the pluribus device cannot be open."""
     pass
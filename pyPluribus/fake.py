@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+# Copyright 2016 CloudFlare, Inc. All rights reserved.
+#
+# The contents of this file are licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the
+# License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""
+Contains the FakeSwitch class, behaving like a Pluribus switch, thus PluribusDevice and PluribusConfig can be tested
+end to end, or benchmarked, without a real device. The FakeTransport backend executes the commands on a FakeSwitch in
+the same process, without SSH, thus without paramiko; pyPluribus.fakeserver serves a FakeSwitch over SSH.
+
+Example:
+
+.. code-block:: python
+
+    from pyPluribus import PluribusDevice
+    from pyPluribus.fake import FakeSwitch
+
+    switch = FakeSwitch(running_config='vlan-create id 1 scope local', latency=0.05)
+    device = PluribusDevice('fake-switch', 'username', 'password', transport='fake',
+                            transport_options={'switch': switch})
+"""
+
+from __future__ import absolute_import
+
+import collections
+import os
+import re
+import socket
+import threading
+import time
+
+# local modules
+from pyPluribus.objects import parse_line
+from pyPluribus.transport import Transport
+
+
+_COMMAND_NAME = re.compile(r'^[a-z0-9]+(-[a-z0-9]+)+$')
+_VERBS = ('create', 'delete', 'modify', 'add', 'remove', 'show')
+
+
+class FakeSwitch(object):
+
+    """
+    Emulates the CLI of a Pluribus switch: the show commands return the tables configured, the configuration
+    commands change the running config (`*-create`, `*-modify`, `*-delete`, `*-add`, `*-remove`).
+    """
+
+    def __init__(self, hostname='fake-switch', running_config='', tables=None,  # pylint: disable=too-many-arguments
+                 latency=0.0, errors=None, warnings=None):
+        """
+        :param hostname: Name of the switch, printed in the banner and in the prompt.
+        :param running_config: Initial running config.
+        :param tables: Output of the show commands: dictionary command -> (column names, rows),
+            e.g. {'vlan-show': (('id', 'scope'), [(1, 'local')])}.
+        :param latency: Number of seconds spent executing each command.
+        :param errors: Errors to be injected: dictionary regular expression -> error message. The commands matching
+            the expression fail with the message.
+        :param warnings: Warnings to be injected: dictionary regular expression -> message. The commands matching the
+            expression print the message on stderr, before their output, and succeed.
+
+        The `relogin` attribute is the number of the next commands answered with the login prompt instead, as when the
+        session of the switch expired.
+        """
+        self.hostname = hostname
+        self._config = collections.OrderedDict()  # (object type, verb, identifier) -> line
+        self.running_config = running_config.splitlines()
+        self.tables = dict(tables or {})
+        self.latency = latency
+        self.errors = dict(errors or {})
+        self.warnings = dict(warnings or {})
+        self.commands = []  # all commands received, in order
+        self.relogin = 0
+        self._lock = threading.Lock()
+
+    @property
+    def running_config(self):
+        """Lines of the running config."""
+        return list(self._config.values())
+
+    @running_config.setter
+    def running_config(self, lines):
+        self._config = collections.OrderedDict()
+        for line in lines:
+            line = ' '.join(line.split())
+            if not line:
+                continue
+            parsed = parse_line(line)
+            if parsed is None:
+                self._config[(None, None, (line,))] = line  # not a command, e.g. a comment: kept as it is
+            else:
+                self._configure(parsed, strict=False)
+
+    @property
+    def banner(self):
+        """First line printed by the switch when a session is open."""
+        return 'Connected to Switch {hostname}; nvOS Identifier:0x1; Ver: 2.5.0'.format(hostname=self.hostname)
+
+    @property
+    def prompt(self):
+        """Prompt of the interactive shell."""
+        return 'CLI (network-admin@{hostname}) > '.format(hostname=self.hostname)
+
+    def execute(self, command):
+        """
+        Executes a command.
+
+        :param command: Command to be executed.
+        :return: Tuple (output, error output, exit status)
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.commands.append(command)
+            output, err_output, exit_status = self._execute(command)
+        warnings = ''.join('{message}\n'.format(message=message) for pattern, message in self.warnings.items()
+                           if re.search(pattern, command))
+        return output, warnings + err_output, exit_status
+
+    def _execute(self, command):
+        """Executes a command, holding the lock."""
+        if self.relogin:
+            self.relogin -= 1
+            return 'Please enter username and password:', '', 0
+        for pattern, message in self.errors.items():
+            if re.search(pattern, command):
+                return '', '{message}\n'.format(message=message), 1
+        tokens = command.split()
+        if not tokens:
+            return '', '', 0
+        if tokens[0] == 'help':
+            return ''.join('{number}-show\n'.format(number=number) for number in range(150)), '', 0
+        if not _COMMAND_NAME.match(tokens[0]) or tokens[0].rsplit('-', 1)[1] not in _VERBS:
+            return '', '{name}: command not found\n'.format(name=tokens[0]), 1
+        if tokens[0].endswith('-show'):
+            return self._show(tokens[0], tokens[1:]), '', 0
+        return self._configure(parse_line(' '.join(tokens)))
+
+    def _show(self, name, args):
+        """Output of a show command."""
+        if name == 'running-config-show':
+            return ''.join('{line}\n'.format(line=line) for line in self._config.values())
+        delim = ':'
+        if 'parsable-delim' in args:
+            delim = args[args.index('parsable-delim') + 1]
+        columns, rows = self.tables.get(name, ((), ()))
+        positions = list(range(len(columns)))
+        if 'format' in args and args[args.index('format') + 1] != 'all':
+            positions = [columns.index(column) for column in args[args.index('format') + 1].split(',')]
+        output = []
+        if 'show-headers' in args:
+            output.append(delim.join(columns[position] for position in positions))
+        for row in rows:
+            output.append(delim.join(str(row[position]) for position in positions))
+        return ''.join('{line}\n'.format(line=line) for line in output)
+
+    def _configure(self, parsed, strict=True):
+        """
+        Applies a configuration command on the running config. Unless not `strict`, e.g. when the running config is
+        loaded, the object must not exist before `*-create` and must exist before `*-modify`; the objects identified
+        by a port exist without being created.
+        """
+        created = (parsed.object, 'create', parsed.key) in self._config
+        if strict and parsed.verb == 'create' and created:
+            return '', '{object}-create: object already exists\n'.format(object=parsed.object), 1
+        if strict and parsed.verb == 'modify' and parsed.key and parsed.key[0] != 'port' and not created:
+            return '', '{object}-modify: object not found\n'.format(object=parsed.object), 1
+        if parsed.verb in ('create', 'modify'):
+            self._config[(parsed.object, parsed.verb, parsed.key)] = parsed.line  # replaces the previous line
+        elif parsed.verb == 'delete':
+            if (parsed.object, 'create', parsed.key) not in self._config:
+                return '', '{object}-delete: object not found\n'.format(object=parsed.object), 1
+            del self._config[(parsed.object, 'create', parsed.key)]
+            self._config.pop((parsed.object, 'modify', parsed.key), None)
+        elif parsed.verb == 'add':
+            self._config[(parsed.object, 'add', parsed.args)] = parsed.line
+        elif parsed.verb == 'remove':
+            self._config.pop((parsed.object, 'add', parsed.args), None)
+        else:
+            self._config[(parsed.object, parsed.verb, parsed.args)] = parsed.line
+        return '', '', 0
+
+
+def _exec_output(switch, command):
+    """Output, error output and exit status of a command executed in its own session, the banner included."""
+    output, err_output, exit_status = switch.execute(command)
+    if output or not err_output:
+        output = '{banner}\n{output}'.format(banner=switch.banner, output=output)
+    return output.encode('utf-8'), err_output.encode('utf-8'), exit_status
+
+
+def _shell_output(switch, command):
+    """Output and error output of a command executed in the interactive shell, followed by the prompt."""
+    output, err_output, _ = switch.execute(command)
+    return '{output}{prompt}'.format(output=output, prompt=switch.prompt).encode('utf-8'), err_output.encode('utf-8')
+
+
+def _shell_banner(switch):
+    """Printed when the interactive shell starts."""
+    return '{banner}\n{prompt}'.format(banner=switch.banner, prompt=switch.prompt).encode('utf-8')
+
+
+class _FakeSession(object):
+
+    """Session of the FakeTransport: the output is computed as soon as the command is received."""
+
+    def __init__(self, switch):
+        self._switch = switch
+        self._output = b''
+        self._err_output = b''
+        self._shell = False
+        self._received = b''
+        self._closed = False
+        self._signal = None  # pipe, readable while the session is open: the output is always ready
+        self.eof_received = False
+
+    def settimeout(self, timeout):
+        pass
+
+    def exec_command(self, command):
+        self._output, self._err_output, _ = _exec_output(self._switch, command)
+        self.eof_received = True
+
+    def invoke_shell(self):
+        self._shell = True
+        self._output = _shell_banner(self._switch)
+
+    def sendall(self, data):
+        if self._closed:
+            raise socket.error('Session closed.')
+        self._received += data
+        while b'\n' in self._received:
+            command, self._received = self._received.split(b'\n', 1)
+            command = command.decode('utf-8').strip()
+            if command == 'exit':
+                self.eof_received = True
+                return
+            output, err_output = _shell_output(self._switch, command)
+            self._output += output
+            self._err_output += err_output
+
+    def recv(self, size):
+        if not self._output and self._shell and not self.eof_received:
+            raise socket.timeout('timed out')  # the shell waits for a command
+        data, self._output = self._output[:size], self._output[size:]
+        return data
+
+    def recv_ready(self):
+        return bool(self._output)
+
+    def recv_stderr(self, size):
+        data, self._err_output = self._err_output[:size], self._err_output[size:]
+        return data
+
+    def recv_stderr_ready(self):
+        return bool(self._err_output)
+
+    def fileno(self):
+        if self._signal is None:
+            self._signal = os.pipe()
+            os.write(self._signal[1], b'.')
+        return self._signal[0]
+
+    def close(self):
+        self._closed = True
+        if self._signal is not None:
+            os.close(self._signal[0])
+            os.close(self._signal[1])
+            self._signal = None
+
+
+class FakeTransport(Transport):
+
+    """
+    Executes the commands on a FakeSwitch in the same process, without SSH: transport='fake' and
+    transport_options={'switch': switch}. Any username and password are accepted.
+    """
+
+    def __init__(self, hostname, port, username, password,  # pylint: disable=too-many-arguments
+                 timeout=60, keepalive=60, switch=None):
+        """
+        :param switch: FakeSwitch executing the commands. Default: a new FakeSwitch.
+        """
+        super(FakeTransport, self).__init__(hostname, port, username, password, timeout, keepalive)
+        self.switch = switch or FakeSwitch(hostname=hostname)
+        self._active = False
+
+    def connect(self):
+        self._active = True
+
+    def open_session(self):
+        if not self._active:
+            raise socket.error('The connection is closed.')
+        return _FakeSession(self.switch)
+
+    def is_active(self):
+        return self._active
+
+    def close(self):
+        self._active = False
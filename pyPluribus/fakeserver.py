@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# Copyright 2016 CloudFlare, Inc. All rights reserved.
+#
+# The contents of this file are licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the
+# License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""
+Contains the FakePluribusServer class: a local SSH server serving a pyPluribus.fake.FakeSwitch, thus the SSH
+connections and sessions of PluribusDevice can be tested end to end, or benchmarked, without a real device.
+Requires paramiko.
+
+Example:
+
+.. code-block:: python
+
+    from pyPluribus import PluribusDevice
+    from pyPluribus.fake import FakeSwitch
+    from pyPluribus.fakeserver import FakePluribusServer
+
+    switch = FakeSwitch(running_config='vlan-create id 1 scope local', latency=0.05)
+    with FakePluribusServer(switch) as server:
+        device = PluribusDevice('127.0.0.1', 'username', 'password', port=server.port)
+        device.open()
+        device.config.load_candidate(config='vlan-create id 10 scope local')
+"""
+
+from __future__ import absolute_import
+
+import logging
+import socket
+import threading
+
+import paramiko
+
+# local modules
+from pyPluribus.fake import FakeSwitch, _exec_output, _shell_banner, _shell_output
+
+
+# the server side of the connections closed by the clients is logged as errors by paramiko
+_LOG_CHANNEL = 'pyPluribus.fakeserver'
+logging.getLogger(_LOG_CHANNEL).addHandler(logging.NullHandler())
+
+
+class _FakeSSHServer(paramiko.ServerInterface):
+
+    """Handles the requests of one SSH connection."""
+
+    def __init__(self, fake_server):
+        self._fake_server = fake_server
+
+    def check_auth_password(self, username, password):
+        if (username, password) == (self._fake_server.username, self._fake_server.password):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, channel, term, width, height,  # pylint: disable=too-many-arguments
+                                  pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        if isinstance(command, bytes):
+            command = command.decode('utf-8')
+        _start_thread(self._exec, channel, command)
+        return True
+
+    def check_channel_shell_request(self, channel):
+        _start_thread(self._shell, channel)
+        return True
+
+    def _exec(self, channel, command):
+        """Executes one command, then closes the output. The error output, e.g. the warnings, is sent first."""
+        output, err_output, exit_status = _exec_output(self._fake_server.switch, command)
+        if err_output:
+            channel.sendall_stderr(err_output)
+        if output:
+            channel.sendall(output)
+        channel.send_exit_status(exit_status)
+        channel.shutdown_write()  # EOF: the client closes the channel
+
+    def _shell(self, channel):
+        """Interactive shell: executes the commands received, one per line, printing the prompt after each."""
+        switch = self._fake_server.switch
+        channel.sendall(_shell_banner(switch))
+        received = b''
+        while True:
+            data = channel.recv(4096)
+            if not data:
+                break
+            received += data
+            while b'\n' in received:
+                command, received = received.split(b'\n', 1)
+                command = command.decode('utf-8').strip()
+                if command == 'exit':
+                    channel.close()
+                    return
+                output, err_output = _shell_output(switch, command)
+                if err_output:
+                    channel.sendall_stderr(err_output)
+                channel.sendall(output)
+        channel.close()
+
+
+def _start_thread(target, *args):
+    """Starts a daemon thread."""
+    thread = threading.Thread(target=target, args=args)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+class FakePluribusServer(object):
+
+    """
+    SSH server listening on localhost, serving a FakeSwitch: the commands can be executed in separate sessions or
+    through an interactive shell.
+    """
+
+    _host_key = None  # generated once, slow
+
+    def __init__(self, switch=None, username='username', password='password',  # pylint: disable=too-many-arguments
+                 host='127.0.0.1', port=0):
+        """
+        :param switch: FakeSwitch serving the commands. Default: a new FakeSwitch.
+        :param username: Username accepted.
+        :param password: Password accepted.
+        :param host: Address to listen on. Default: 127.0.0.1
+        :param port: Port to listen on. Default: a free port, see the port attribute after start().
+        """
+        self.switch = switch or FakeSwitch()
+        self.username = username
+        self.password = password
+        self.host = host
+        self.port = port
+        self.connections = 0  # number of SSH connections accepted so far
+        self._socket = None
+        self._transports = []
+
+    def start(self):
+        """Starts listening for connections, in background."""
+        if FakePluribusServer._host_key is None:
+            FakePluribusServer._host_key = paramiko.RSAKey.generate(2048)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.port))
+        self._socket.listen(100)
+        self.port = self._socket.getsockname()[1]
+        _start_thread(self._accept)
+        return self
+
+    def _accept(self):
+        """Accepts the connections."""
+        while True:
+            try:
+                client, _ = self._socket.accept()
+            except (socket.error, OSError):  # closed
+                return
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            transport = paramiko.Transport(client)
+            transport.set_log_channel(_LOG_CHANNEL)
+            transport.add_server_key(self._host_key)
+            transport.start_server(server=_FakeSSHServer(self))
+            self._transports.append(transport)
+            self.connections += 1
+
+    def stop(self):
+        """Stops listening and closes the connections."""
+        self._socket.close()
+        for transport in self._transports:
+            transport.close()
+        self._transports = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
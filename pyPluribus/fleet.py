@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# Copyright 2016 CloudFlare, Inc. All rights reserved.
+#
+# The contents of this file are licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the
+# License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""
+Contains the PluribusFleet class, executing the same operations on many Pluribus devices in parallel.
+"""
+
+from __future__ import absolute_import
+
+import collections
+import threading
+import time
+
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
+
+# local modules
+import pyPluribus.exceptions
+
+
+class FleetResult(collections.namedtuple('FleetResult', ['result', 'error', 'elapsed'])):
+
+    """Outcome of an operation on one device: the result or the exception raised, and the time spent (seconds)."""
+
+    __slots__ = ()
+
+
+class PluribusFleet(object):
+
+    """
+    Executes the same operations on many PluribusDevice objects, in parallel, using a limited number of threads.
+    Every operation returns a dictionary having the hostname of each device as key and a FleetResult as value:
+    a device failing or being too slow does not prevent to collect the results from the others.
+    """
+
+    def __init__(self, devices, max_workers=32, timeout=None):
+        """
+        :param devices: Iterable of PluribusDevice objects, having distinct hostnames.
+        :param max_workers: Maximum number of devices handled at the same time.
+        :param timeout: Default number of seconds to wait for an operation to finish on all devices. Default: no limit.
+        :raise ValueError: when several devices have the same hostname: the results could not be told apart
+        """
+        self.devices = list(devices)
+        hostnames = [device.hostname for device in self.devices]
+        duplicates = sorted(set(hostname for hostname in hostnames if hostnames.count(hostname) > 1))
+        if duplicates:
+            raise ValueError('Several devices have the same hostname: {hostnames}'.format(
+                hostnames=', '.join(duplicates)))
+        self._max_workers = max_workers
+        self._timeout = timeout
+
+    def run(self, function, timeout=None):
+        """
+        Calls function(device) for every device.
+
+        :param function: Callable receiving the PluribusDevice object.
+        :param timeout: Number of seconds to wait for all devices. The devices not finished in time have a
+            pyPluribus.exceptions.TimeoutError as error. Default: the timeout of the fleet.
+        :return: Dictionary hostname -> FleetResult
+
+        Example:
+
+        .. code-block:: python
+
+            fleet.run(lambda device: device.config.compare())
+        """
+        if timeout is None:
+            timeout = self._timeout
+        deadline = None
+        if timeout is not None:
+            deadline = time.time() + timeout
+
+        pending = queue.Queue()
+        for position, device in enumerate(self.devices):
+            pending.put((position, device))
+        results = [None] * len(self.devices)  # in the order of the devices
+        done = [0]  # number of devices finished
+        finished = threading.Condition()
+        expired = threading.Event()
+
+        def _worker():
+            """Handles the pending devices, one at a time, till the deadline."""
+            while not expired.is_set():
+                try:
+                    position, device = pending.get_nowait()
+                except queue.Empty:
+                    return
+                started = time.time()
+                try:
+                    result = FleetResult(function(device), None, time.time() - started)
+                except Exception as err:  # pylint: disable=broad-except
+                    result = FleetResult(None, err, time.time() - started)
+                with finished:
+                    results[position] = result
+                    done[0] += 1
+                    finished.notify()
+
+        for _ in range(min(len(self.devices), self._max_workers)):
+            worker = threading.Thread(target=_worker)
+            worker.daemon = True  # a device stuck will not block the exit
+            worker.start()
+
+        with finished:
+            while done[0] < len(self.devices):
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                finished.wait(remaining)
+            expired.set()
+            results = list(results)
+
+        fleet_results = {}
+        for device, result in zip(self.devices, results):
+            fleet_results[device.hostname] = result
+            if result is None:
+                fleet_results[device.hostname] = FleetResult(
+                    None,
+                    pyPluribus.exceptions.TimeoutError('{hostname} did not finish in {timeout} seconds.'.format(
+                        hostname=device.hostname,
+                        timeout=timeout
+                    )),
+                    timeout
+                )
+        return fleet_results
+
+    def open(self, timeout=None):
+        """Opens the connections with all devices."""
+        return self.run(lambda device: device.open(), timeout)
+
+    def close(self, timeout=None):
+        """Closes the connections with all devices."""
+        return self.run(lambda device: device.close(), timeout)
+
+    def cli(self, command, timeout=None):
+        """Executes a command on all devices and returns the raw outputs."""
+        return self.run(lambda device: device.cli(command), timeout)
+
+    def show(self, command, delim=';', timeout=None):
+        """Executes a show-type command on all devices and returns the parsable outputs."""
+        return self.run(lambda device: device.show(command, delim), timeout)
+
+    def show_records(self, command, columns=None, delim=';', timeout=None):
+        """Executes a show-type command on all devices and returns the records."""
+        return self.run(lambda device: device.show_records(command, columns, delim), timeout)
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# Copyright 2016 CloudFlare, Inc. All rights reserved.
+#
+# The contents of this file are licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the
+# License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""
+Instrumentation of PluribusDevice and PluribusConfig: the time spent in each phase of the commands, the number of
+bytes read, and the duration of the configuration operations (spans).
+
+Every command executed is reported as a CommandMetrics, with the time spent:
+    * `session_open`: opening the SSH session, or waiting for a session opened ahead, or for the shell
+    * `exec`: sending the command
+    * `wait`: waiting for the first bytes of the output, i.e. the device executing the command
+    * `read`: receiving the rest of the output, till EOF or the prompt. The banner is only the first line of the
+      output, dropped as it is received, thus its cost is included here
+
+Example:
+
+.. code-block:: python
+
+    from pyPluribus import PluribusDevice
+    from pyPluribus.instrumentation import MetricsCollector
+
+    metrics = MetricsCollector()
+    device = PluribusDevice('sw50.jnb01', 'username', 'password', instrumentation=metrics)
+    device.open()
+    device.config.load_candidate(config=my_config)
+    metrics.snapshot()['spans']['load_candidate']
+"""
+
+from __future__ import absolute_import
+
+import collections
+import contextlib
+import threading
+import time
+
+
+PHASES = ('session_open', 'exec', 'wait', 'read')
+
+
+class CommandMetrics(collections.namedtuple('CommandMetrics', ['name', 'command', 'phases', 'elapsed', 'bytes_read',
+                                                               'error'])):
+
+    """One command executed: name (first word of the command), command, time spent in each phase (dictionary phase ->
+    seconds), total time, bytes received and the exception raised, if any."""
+
+    __slots__ = ()
+
+
+class Span(collections.namedtuple('Span', ['name', 'started', 'elapsed', 'commands', 'error'])):
+
+    """One configuration operation: name, start time (epoch), seconds elapsed, number of commands other than
+    show-type executed meanwhile by the device, and the exception raised, if any."""
+
+    __slots__ = ()
+
+
+class Instrumentation(object):
+
+    """
+    Receives the metrics of a PluribusDevice. Subclass it and override on_command() and on_span() to export the
+    metrics, e.g. to statsd or Prometheus. The methods are called from the threads executing the commands, thus
+    they must be thread-safe and fast.
+    """
+
+    def on_command(self, metrics):
+        """
+        Called after every command, successful or not.
+
+        :param metrics: CommandMetrics
+        """
+        pass
+
+    def on_span(self, span):
+        """
+        Called after every configuration operation: `load_candidate`, `commit`, `discard`, `rollback`, `compare`,
+        `download_running_config`.
+
+        :param span: Span
+        """
+        pass
+
+
+class MetricsCollector(Instrumentation):
+
+    """Aggregates the metrics in memory: count, errors and totals per command name and per span name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._commands = {}
+        self._spans = {}
+
+    def on_command(self, metrics):
+        with self._lock:
+            totals = self._commands.setdefault(metrics.name, dict(count=0, errors=0, elapsed=0.0, bytes_read=0,
+                                                                  **dict((phase, 0.0) for phase in PHASES)))
+            totals['count'] += 1
+            totals['errors'] += metrics.error is not None
+            totals['elapsed'] += metrics.elapsed
+            totals['bytes_read'] += metrics.bytes_read
+            for phase, elapsed in metrics.phases.items():
+                totals[phase] += elapsed
+
+    def on_span(self, span):
+        with self._lock:
+            totals = self._spans.setdefault(span.name, dict(count=0, errors=0, elapsed=0.0, commands=0))
+            totals['count'] += 1
+            totals['errors'] += span.error is not None
+            totals['elapsed'] += span.elapsed
+            totals['commands'] += span.commands
+
+    def snapshot(self):
+        """
+        Returns the totals so far.
+
+        :return: Dictionary with two keys: `commands` (command name -> count, errors, elapsed, bytes_read and the
+            seconds spent in each phase) and `spans` (span name -> count, errors, elapsed, commands)
+        """
+        with self._lock:
+            return {
+                'commands': dict((name, dict(totals)) for name, totals in self._commands.items()),
+                'spans': dict((name, dict(totals)) for name, totals in self._spans.items())
+            }
+
+    def reset(self):
+        """Drops the totals."""
+        with self._lock:
+            self._commands = {}
+            self._spans = {}
+
+
+class CommandTimer(object):
+
+    """Measures the phases of one command; reports them when finished."""
+
+    def __init__(self, instrumentation, command):
+        self._instrumentation = instrumentation
+        self._command = command
+        self._started = time.time()
+        self._last = self._started
+        self._phases = {}
+        self._bytes_read = 0
+        self._finished = False
+
+    def phase(self, name):
+        """Ends a phase: the time since the previous phase ended is added to this one."""
+        now = time.time()
+        self._phases[name] = self._phases.get(name, 0.0) + now - self._last
+        self._last = now
+
+    def count(self, recv):
+        """Wraps a recv function, counting the bytes received; the time till the first bytes is the wait phase."""
+        def _recv(size):
+            data = recv(size)
+            if not self._bytes_read:
+                self.phase('wait')
+            self._bytes_read += len(data)
+            return data
+        return _recv
+
+    def finish(self, error=None):
+        """Reports the command, once."""
+        if self._finished:
+            return
+        self._finished = True
+        self.phase('read' if self._bytes_read else 'wait')
+        tokens = self._command.split()
+        self._instrumentation.on_command(CommandMetrics(
+            tokens[0] if tokens else '',
+            self._command,
+            self._phases,
+            self._last - self._started,
+            self._bytes_read,
+            error
+        ))
+
+
+class _NullTimer(object):
+
+    """Used when the device is not instrumented: measures nothing."""
+
+    def phase(self, name):
+        pass
+
+    def count(self, recv):  # pylint: disable=no-self-use
+        return recv
+
+    def finish(self, error=None):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def command_timer(instrumentation, command):
+    """Returns the timer of a command, or a timer measuring nothing when there is no instrumentation."""
+    if instrumentation is None:
+        return _NULL_TIMER
+    return CommandTimer(instrumentation, command)
+
+
+@contextlib.contextmanager
+def span(instrumentation, name, device):
+    """Reports the duration of the operation executed inside the block, as a Span."""
+    if instrumentation is None:
+        yield
+        return
+    started = time.time()
+    write_count = device.write_count
+    error = None
+    try:
+        yield
+    except Exception as spanerr:
+        error = spanerr
+        raise
+    finally:
+        # each command is counted before and after its execution
+        instrumentation.on_span(Span(name, started, time.time() - started, (device.write_count - write_count) // 2,
+                                     error))
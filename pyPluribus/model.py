@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+# Copyright 2016 CloudFlare, Inc. All rights reserved.
+#
+# The contents of this file are licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the
+# License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""
+Contains the RunningConfig class: the running configuration parsed once and indexed by object type, identifier,
+name and port.
+"""
+
+from __future__ import absolute_import
+
+import collections
+
+# local modules
+from pyPluribus.objects import config_lines, parse_line, setting
+
+
+# arguments referencing ports, e.g.: `trunk-create name core05 port 4,8`, `vlan-port-add vlan-id 10 ports 1-4`
+_PORT_ARGS = frozenset(['port', 'ports'])
+
+
+def _expand_ports(ports):
+    """Expands a list of ports such as `1,3-5` into: 1, 3, 4, 5."""
+    expanded = []
+    for port in ports.split(','):
+        first, _, last = port.partition('-')
+        if last and first.isdigit() and last.isdigit():
+            expanded.extend(str(number) for number in range(int(first), int(last) + 1))
+        elif port:
+            expanded.append(port)
+    return expanded
+
+
+def _index_keys(parsed):
+    """The keys of the indexes referencing the line."""
+    keys = [('type', parsed.object), ('object', (parsed.object, parsed.key))]
+    for position, arg in enumerate(parsed.args[:-1]):
+        value = parsed.args[position + 1]
+        if arg == 'name':
+            keys.append(('name', value))
+        elif arg in _PORT_ARGS:
+            keys.extend(('port', port) for port in _expand_ports(value))
+    return keys
+
+
+def _restates(parsed, existing):
+    """
+    Tells if a line sets again all the settings of an existing line it replaces: `vlan-modify id 10 description core`
+    restates `vlan-modify id 10 description edge`, but not `vlan-modify id 10 description edge stats`.
+    A token not restated is accepted only as the value of the setting preceding it, e.g. `edge`.
+    """
+    settings = set(setting(token) for token in parsed.args[len(parsed.key):])
+    existing_args = existing.args[len(existing.key):]
+    for position, token in enumerate(existing_args):
+        if setting(token) in settings:
+            continue
+        if position and setting(existing_args[position - 1]) in settings:
+            continue  # the value of a setting restated
+        return False
+    return True
+
+
+class RunningConfig(object):
+
+    """
+    The running configuration, parsed and indexed: finding the objects of a type, an object by its identifier, the
+    objects having a name or using a port does not require to scan the whole configuration.
+    The model can be updated with the commands executed after the download, see apply().
+    """
+
+    def __init__(self, config=''):
+        """
+        :param config: Running configuration, as returned by the `running-config-show` command.
+        """
+        self._lines = collections.OrderedDict()  # line -> ConfigLine; lines not parsable -> None
+        self._indexes = collections.defaultdict(collections.OrderedDict)  # (index, value) -> {line: ConfigLine}
+        for line in config_lines(config):
+            self._add(line)
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        return iter(self._lines)
+
+    def __contains__(self, line):
+        return line.strip() in self._lines
+
+    def __str__(self):
+        return '\n'.join(self._lines)
+
+    def _add(self, line):
+        """Adds a line to the model."""
+        if line in self._lines:
+            return
+        parsed = parse_line(line)
+        self._lines[line] = parsed
+        if parsed is not None:
+            for key in _index_keys(parsed):
+                self._indexes[key][line] = parsed
+
+    def _remove(self, line):
+        """Removes a line from the model."""
+        parsed = self._lines.pop(line, None)
+        if parsed is None:
+            return
+        for key in _index_keys(parsed):
+            lines = self._indexes[key]
+            lines.pop(line, None)
+            if not lines:
+                del self._indexes[key]
+
+    def _find(self, index, value, object_type=None):
+        """Returns the lines referenced by the index, optionally only the lines configuring a type of objects."""
+        lines = self._indexes.get((index, value), {})
+        return [parsed for parsed in lines.values() if object_type is None or parsed.object == object_type]
+
+    def apply(self, command):
+        """
+        Updates the model after a command was executed successfully on the device.
+
+        :param command: Command executed.
+        :return: False when the effect of the command on the running configuration is not known: the model must be
+            built again from a new download. E.g. a `*-remove` not matching exactly a `*-add` line, as
+            `vlan-port-remove vlan-id 10 ports 2` when the ports were added as `1-4`, or a `*-modify` not restating
+            the other settings of the line it replaces.
+        """
+        if not command.strip():
+            return True
+        parsed = parse_line(command.strip())
+        if parsed is None:
+            return False
+        if parsed.verb == 'create' or parsed.verb == 'modify':
+            replaced = [existing for existing in self._find('object', (parsed.object, parsed.key))
+                        if existing.verb == parsed.verb]  # the new line replaces the previous one
+            if not all(_restates(parsed, existing) for existing in replaced):
+                return False  # the settings not restated are kept by the device, but not by a single line
+            for existing in replaced:
+                self._remove(existing.line)
+            self._add(parsed.line)
+        elif parsed.verb == 'delete':
+            for existing in self._find('object', (parsed.object, parsed.key)):
+                self._remove(existing.line)
+        elif parsed.verb == 'add':
+            self._add(parsed.line)
+        elif parsed.verb == 'remove':
+            added = ' '.join(('{object}-add'.format(object=parsed.object),) + parsed.args)
+            if added not in self._lines:
+                return False  # e.g. removes only some of the ports added
+            self._remove(added)
+        else:
+            return False
+        return True
+
+    def objects(self, object_type):
+        """
+        Returns the lines configuring the objects of a type.
+
+        :param object_type: Type of the objects, e.g.: `vlan`, `trunk`, `port-config`.
+        :return: List of pyPluribus.objects.ConfigLine
+        """
+        return self._find('type', object_type)
+
+    def lookup(self, object_type, identifier, value):
+        """
+        Returns the lines configuring an object.
+
+        :param object_type: Type of the object, e.g.: `vlan`.
+        :param identifier: Argument identifying the object, e.g.: `id`.
+        :param value: Value of the identifier, e.g.: 100.
+        :return: List of pyPluribus.objects.ConfigLine, empty when the object does not exist
+
+        Example:
+
+        .. code-block:: python
+
+            >>> model.lookup('vlan', 'id', 100)
+            [ConfigLine(object='vlan', verb='create', key=('id', '100'), args=('id', '100', 'scope', 'local'), ...)]
+        """
+        return self._find('object', (object_type, (identifier, str(value))))
+
+    def exists(self, object_type, identifier, value):
+        """Tells if an object exists, e.g.: `model.exists('vlan', 'id', 100)`."""
+        return any(parsed.verb == 'create' for parsed in self.lookup(object_type, identifier, value))
+
+    def named(self, name, object_type=None):
+        """
+        Returns the lines having the `name` argument, optionally only the lines configuring a type of objects.
+
+        :param name: Name of the object, e.g.: `core05.scl01`.
+        :param object_type: Type of the objects, e.g.: `trunk`. Default: all types.
+        :return: List of pyPluribus.objects.ConfigLine
+        """
+        return self._find('name', name, object_type)
+
+    def on_port(self, port, object_type=None):
+        """
+        Returns the lines referencing a port, optionally only the lines configuring a type of objects.
+
+        :param port: Number of the port.
+        :param object_type: Type of the objects, e.g.: `trunk`. Default: all types.
+        :return: List of pyPluribus.objects.ConfigLine
+
+        Example:
+
+        .. code-block:: python
+
+            >>> [trunk.key for trunk in model.on_port(4, 'trunk')]  # which trunks include port 4
+            [('name', 'core05.scl01')]
+        """
+        return self._find('port', str(port), object_type)
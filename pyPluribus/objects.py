@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+# Copyright 2016 CloudFlare, Inc. All rights reserved.
+#
+# The contents of this file are licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the
+# License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""
+Interprets the lines of the Pluribus configuration as operations on objects.
+Every line is a command such as `vlan-create id 10 scope local`: the type of the object (`vlan`), the verb
+(`create`) and the arguments, the first pair identifying the object (`id 10`).
+"""
+
+from __future__ import absolute_import
+
+import collections
+import difflib
+
+
+class ConfigLine(collections.namedtuple('ConfigLine', ['object', 'verb', 'key', 'args', 'line'])):
+
+    """One line of the configuration: type of the object, verb, identifier, arguments and the line itself."""
+
+    __slots__ = ()
+
+
+# arguments identifying an object, when the first argument of the command
+# the create and delete commands always start with the identifier of the object
+_IDENTIFIERS = frozenset([
+    'community-string',
+    'name',
+    'id',
+    'vlan-id',
+    'vlan',
+    'port',
+    'vnet',
+    'vrouter-name',
+    'vxlan',
+    'ip',
+    'mac'
+])
+
+# the command undoing each verb; the verbs not listed here cannot be undone
+_INVERSE_VERBS = {
+    'create': 'delete',
+    'add': 'remove'
+}
+
+
+def _split_command(line):
+    """Splits a command into: type of the object, verb, identifier and arguments. None if not a command."""
+    tokens = line.split()
+    if not tokens or '-' not in tokens[0]:
+        return None
+    object_type, verb = tokens[0].rsplit('-', 1)
+    args = tuple(tokens[1:])
+    key = ()  # objects without identifier, e.g. the global settings
+    if len(args) > 1 and (verb in ('create', 'delete') or args[0] in _IDENTIFIERS):
+        key = args[:2]
+    return object_type, verb, key, args
+
+
+def parse_line(line):
+    """
+    Parses one line of the configuration.
+
+    :param line: Line of the configuration.
+    :return: ConfigLine or None when the line is not a command of the form `[OBJECT]-[VERB] [ARGS]`
+
+    Example:
+
+    .. code-block:: python
+
+        >>> parse_line('vlan-create id 10')
+        ConfigLine(object='vlan', verb='create', key=('id', '10'), args=('id', '10'), line='vlan-create id 10')
+    """
+    command = _split_command(line)
+    if command is None:
+        return None
+    return ConfigLine(*(command + (line,)))
+
+
+def config_lines(config):
+    """Returns the non-empty lines of a configuration, without the surrounding whitespaces."""
+    return [line.strip() for line in config.splitlines() if line.strip()]
+
+
+def _command(object_type, verb, args):
+    """Builds a command."""
+    return ' '.join(('{object}-{verb}'.format(object=object_type, verb=verb),) + tuple(args)).strip()
+
+
+def _references(deleted_objects):
+    """
+    The pairs of arguments referring to the objects deleted from other lines: `vlan-id 10` and `vlan 10` refer to
+    the VLAN created by `vlan-create id 10`, e.g. in `vlan-port-add vlan-id 10 ports 1`.
+    """
+    references = set()
+    for object_type, key in deleted_objects:
+        if len(key) == 2:
+            references.add((object_type, key[1]))
+            references.add(('{object}-{name}'.format(object=object_type, name=key[0]), key[1]))
+    return references
+
+
+def reconcile(running_config, target_config):
+    """
+    Computes the commands transforming the running configuration into the target configuration, touching only the
+    objects that differ: the lines missing from the target are undone (`*-delete`, `*-remove`), the lines missing
+    from the running configuration are executed. The lines present in both are not executed again, except the lines
+    of the objects deleted and created again, and the lines referring to them, e.g. `vlan-port-add vlan-id 10 ...`
+    when the VLAN 10 is deleted: the device removes them together with the object.
+    The lines without inverse, e.g. a `*-modify` not present in the target, are left as they are: the previous value
+    is not known, and executing again the whole target configuration would not undo them either.
+
+    :param running_config: Configuration currently running on the device.
+    :param target_config: Desired configuration.
+    :return: List of commands
+    """
+    running = config_lines(running_config)
+    target = config_lines(target_config)
+    running_set = set(running)
+    target_set = set(target)
+
+    removed = []
+    deleted = []
+    deleted_objects = set()
+    for line in running:
+        if line in target_set:
+            continue
+        parsed = parse_line(line)
+        if parsed is None or parsed.verb not in _INVERSE_VERBS:
+            continue
+        if parsed.verb == 'create':
+            deleted.append(_command(parsed.object, _INVERSE_VERBS['create'], parsed.key))
+            deleted_objects.add((parsed.object, parsed.key))
+        else:
+            removed.append(_command(parsed.object, _INVERSE_VERBS['add'], parsed.args))
+
+    references = _references(deleted_objects)
+    executed = []
+    for line in target:
+        if line not in running_set:
+            executed.append(line)
+        elif deleted_objects:
+            parsed = parse_line(line)
+            if parsed is None:
+                continue
+            if (parsed.object, parsed.key) in deleted_objects or references & set(zip(parsed.args, parsed.args[1:])):
+                executed.append(line)  # the object is deleted and created again, with all its settings and dependents
+
+    # undo in the reverse order of the configuration
+    return list(reversed(removed)) + list(reversed(deleted)) + executed
+
+
+def setting(token):
+    """
+    The setting changed by an argument: `no-jumbo` and `jumbo`, `enable` and `disable` change the same setting.
+
+    :param token: Argument of a command.
+    :return: Name of the setting
+
+    Example:
+
+    .. code-block:: python
+
+        >>> setting('no-jumbo')
+        'jumbo'
+    """
+    if token.startswith('no-'):
+        return token[3:]
+    if token == 'disable':
+        return 'enable'
+    return token
+
+
+def _merge(previous, parsed):
+    """
+    Merges a line into the previous line, when both configure the same object and set different settings.
+    Returns the merged line or None.
+    """
+    if previous is None or not parsed.key or (previous.object, previous.key) != (parsed.object, parsed.key):
+        return None
+    if parsed.verb != 'modify' or previous.verb not in ('create', 'modify'):
+        return None
+    previous_settings = set(setting(token) for token in previous.args[len(previous.key):])
+    settings = parsed.args[len(parsed.key):]
+    if not settings or previous_settings & set(setting(token) for token in settings):
+        return None  # the same setting changed twice: the lines are kept as they are, in order
+    return parse_line(' '.join((previous.line,) + settings))
+
+
+def compile_config(config):
+    """
+    Compiles a configuration into fewer commands, with the same effect:
+
+        * the lines are canonicalized: surrounding and repeated whitespaces are removed, the empty lines dropped
+        * a line executed again, while the object has not been changed meanwhile, is dropped
+        * consecutive lines configuring the same object are merged, when they change different settings:
+          `vlan-create id 10 scope local` followed by `vlan-modify id 10 description edge` becomes
+          `vlan-create id 10 scope local description edge`
+
+    The lines are never moved before or after lines configuring other objects.
+    The lines are compiled as they are read, thus the configuration can be read lazily, e.g. from a file.
+
+    :param config: Configuration, or iterable of lines.
+    :return: Generator of commands
+    """
+    if hasattr(config, 'splitlines'):
+        config = config.splitlines()
+    previous = None  # ConfigLine not yielded yet: the next line may be merged into it
+    last_lines = {}  # (object type, identifier) -> last line executed on the object
+    for line in config:
+        line = ' '.join(line.split())
+        if not line:
+            continue
+        parsed = parse_line(line)
+        if parsed is None or parsed.verb not in ('create', 'modify', 'add', 'remove'):
+            # the effect on the other objects is not known, e.g. a delete may also remove their settings
+            if previous is not None:
+                yield previous.line
+                previous = None
+            yield line
+            last_lines = {}
+            continue
+        if last_lines.get((parsed.object, parsed.key)) == line:
+            continue  # executed already
+        merged = _merge(previous, parsed)
+        if merged is None:
+            if previous is not None:
+                yield previous.line
+            merged = parsed
+        previous = merged
+        last_lines[(parsed.object, parsed.key)] = line
+    if previous is not None:
+        yield previous.line
+
+
+def _identity(line):
+    """Identifies the object configured by the line: type of the object, verb and identifier."""
+    command = _split_command(line)
+    if command is None:
+        return (None, None, (line,))  # not a command, compared as it is
+    object_type, verb, key, args = command
+    if verb == 'add':
+        return (object_type, verb, args)  # the members are identified by all arguments
+    return (object_type, verb, key)
+
+
+def _matches(line, prefixes):
+    """Tells if the line starts with one of the prefixes: command or command and identifier."""
+    prefix = tuple(line.split(None, 3)[:3])
+    return prefix in prefixes or prefix[:1] in prefixes
+
+
+def _index_lines(lines):
+    """Indexes the lines by the object they configure: (object type, verb, identifier) -> list of lines."""
+    index = collections.defaultdict(list)
+    for line in lines:
+        index[_identity(line)].append(line)
+    return index
+
+
+class ConfigDiff(object):
+
+    """
+    Differences between two configurations, by object: the order of the lines does not matter.
+    The objects are identified by (object type, verb, identifier), e.g. ('vlan', 'create', ('id', '10')).
+    """
+
+    def __init__(self, old_config, new_config):
+        """
+        :param old_config: Configuration before the changes.
+        :param new_config: Configuration after the changes.
+        """
+        self._old_config = old_config
+        self._new_config = new_config
+        old_lines = set(config_lines(old_config))
+        new_lines = set(config_lines(new_config))
+        # only the lines not present in both configurations are parsed...
+        old_index = _index_lines(old_lines - new_lines)
+        new_index = _index_lines(new_lines - old_lines)
+        # ...and the common lines configuring the same objects, e.g. the other settings of an object modified
+        prefixes = set()  # command and identifier of the objects changed
+        for object_type, verb, key in list(old_index) + list(new_index):
+            command = ('{object}-{verb}'.format(object=object_type, verb=verb),)
+            prefixes.add(command + key if key and verb != 'add' else command)
+        common_index = _index_lines(line for line in old_lines & new_lines if _matches(line, prefixes))
+        for identity, lines in common_index.items():
+            if identity in old_index or identity in new_index:
+                old_index[identity].extend(lines)
+                new_index[identity].extend(lines)
+        old_index = dict((identity, tuple(sorted(lines))) for identity, lines in old_index.items() if lines)
+        new_index = dict((identity, tuple(sorted(lines))) for identity, lines in new_index.items() if lines)
+        self.added = dict((identity, lines) for identity, lines in new_index.items() if identity not in old_index)
+        self.removed = dict((identity, lines) for identity, lines in old_index.items() if identity not in new_index)
+        self.changed = dict((identity, (old_index[identity], lines)) for identity, lines in new_index.items()
+                            if identity in old_index and old_index[identity] != lines)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    __nonzero__ = __bool__  # Python 2
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    @property
+    def text(self):
+        """
+        Unified diff of the lines, in the same order as PluribusConfig.compare(): from the new configuration to the
+        old one, i.e. the lines only in the new configuration are marked with `-`, the lines only in the old one with
+        `+`.
+        """
+        return '\n'.join(difflib.unified_diff(self._new_config.splitlines(), self._old_config.splitlines(), n=0))
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# Copyright 2016 CloudFlare, Inc. All rights reserved.
+#
+# The contents of this file are licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the
+# License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""
+Parsers for the output of the Pluribus CLI.
+The rows of the show commands are represented as namedtuples, one class being generated per command and set of
+columns, thus a row does not carry its own dictionary of column names.
+"""
+
+from __future__ import absolute_import
+
+import collections
+import re
+import threading
+
+
+_NOT_IDENTIFIER_CHARS = re.compile(r'[^0-9a-zA-Z_]+')
+
+_RECORD_CLASSES = {}
+_RECORD_CLASSES_LOCK = threading.Lock()
+
+
+def _identifier(name):
+    """Transforms the name of a column or command into a valid Python identifier."""
+    return _NOT_IDENTIFIER_CHARS.sub('_', name.strip()).strip('_').lower()
+
+
+def record_class(command, columns):
+    """
+    Returns the namedtuple class representing a row of a show command.
+    The class is generated once for each command and set of columns, then reused.
+
+    :param command: Name of the show command, e.g.: `vlan-show`.
+    :param columns: Names of the columns, as printed by the CLI.
+    :return: namedtuple class; the field names are the names of the columns, with `-` replaced by `_`.
+
+    Example:
+
+    .. code-block:: python
+
+        >>> record_class('vlan-show', ['id', 'scope', 'vlan-type'])
+        <class 'pyPluribus.parsers.vlan_show'>
+    """
+    key = (command, tuple(columns))
+    with _RECORD_CLASSES_LOCK:
+        if key not in _RECORD_CLASSES:
+            _RECORD_CLASSES[key] = collections.namedtuple(
+                _identifier(command) or 'record',
+                [_identifier(column) for column in columns],
+                rename=True  # columns not valid as identifiers will be named positionally: _0, _1 etc.
+            )
+        return _RECORD_CLASSES[key]
+
+
+def parse_records(lines, command='record', columns=None, delim=';'):
+    """
+    Parses the parsable output of a show command and yields one record for each row.
+
+    :param lines: Iterable of lines of the parsable output, e.g. as yielded by PluribusDevice.show_iter().
+    :param command: Name of the show command, used to name the class of the records.
+    :param columns: Names of the columns. When not specified, the first line must be the header.
+    :param delim: Delimiter of the fields. Default: ';'
+    :return: Generator of namedtuples
+
+    Example:
+
+    .. code-block:: python
+
+        >>> list(parse_records(['id;scope', '1;local'], command='vlan-show'))
+        [vlan_show(id='1', scope='local')]
+    """
+    lines = iter(lines)
+    if columns is None:
+        header = next(lines, None)
+        if header is None:  # no output
+            return
+        columns = header.split(delim)
+    record = record_class(command, columns)
+    number_of_columns = len(columns)
+    for line in lines:
+        if not line:
+            continue
+        # a delimiter inside the last field will not break the row
+        fields = line.split(delim, number_of_columns - 1)
+        if len(fields) < number_of_columns:
+            fields.extend([''] * (number_of_columns - len(fields)))
+        yield record._make(fields)
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+# Copyright 2016 CloudFlare, Inc. All rights reserved.
+#
+# The contents of this file are licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the
+# License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""
+Contains the TransportRegistry class: SSH connections shared by the PluribusDevice objects connecting to the same
+device with the same credentials, thus only the first one pays the SSH handshake. Every device opens its own sessions
+on the shared connection.
+
+SHARED_TRANSPORTS is the registry of the whole process.
+
+Example:
+
+.. code-block:: python
+
+    from pyPluribus import PluribusDevice
+    from pyPluribus.registry import SHARED_TRANSPORTS
+
+    device = PluribusDevice('sw50.jnb01', 'username', 'password', transport_registry=SHARED_TRANSPORTS)
+    device.open()  # opens the SSH connection
+    other_device = PluribusDevice('sw50.jnb01', 'username', 'password', transport_registry=SHARED_TRANSPORTS)
+    other_device.open()  # reuses the connection
+"""
+
+from __future__ import absolute_import
+
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+
+class _SharedTransport(object):
+
+    """One SSH connection of the registry and its holders."""
+
+    def __init__(self, key, connection, digest):
+        self.key = key
+        self.connection = connection
+        self.digest = digest
+        self.holders = 0
+        self.idle_since = None  # time when the last holder released the connection
+        self.idle_timer = None  # closes the connection once idle for too long
+        self.checked = time.time()  # last health check
+
+
+class TransportRegistry(object):
+
+    """
+    Reference-counted SSH connections, keyed by (hostname, port, username).
+    A connection is reused only by the devices knowing the password used to open it, and only while it is healthy.
+    When released by its last holder, it is kept open for `idle_timeout` seconds, waiting for a new holder, then
+    closed by a timer thread.
+    """
+
+    def __init__(self, idle_timeout=300, health_check_interval=30):
+        """
+        :param idle_timeout: Number of seconds a connection not used by any device is kept open. 0 closes it as
+            soon as released by the last device. Default: 300
+        :param health_check_interval: Number of seconds after which a connection is probed again before being
+            reused; meanwhile, only the state of the transport is checked. Default: 30
+        """
+        self._idle_timeout = idle_timeout
+        self._health_check_interval = health_check_interval
+        self._salt = os.urandom(16)  # the passwords are never kept, only their salted digests
+        self._lock = threading.Lock()
+        self._key_locks = {}  # key -> lock held while opening a connection for the key
+        self._transports = {}  # key -> _SharedTransport available to new holders
+        self._connections = {}  # id(connection) -> _SharedTransport, including the ones not reusable anymore
+        self._session_limits = {}  # key -> semaphore shared by the devices connected with the key
+
+    def _digest(self, password):
+        """Salted digest of a password."""
+        return hashlib.sha256(self._salt + (password or '').encode('utf-8')).digest()
+
+    def _healthy(self, transport):
+        """Tells if a connection can be reused."""
+        if not transport.connection.is_active():
+            return False
+        now = time.time()
+        if now - transport.checked >= self._health_check_interval:
+            if not transport.connection.check():  # detects the broken connections, not noticed yet
+                return False
+            transport.checked = now
+        return True
+
+    def _stop_idle_timer(self, transport):
+        """The connection is used again, or closed: it does not need to be closed when idle anymore."""
+        if transport.idle_timer is not None:
+            transport.idle_timer.cancel()
+            transport.idle_timer = None
+
+    def _start_idle_timer(self, transport):
+        """Closes the connection after `idle_timeout` seconds, unless used again meanwhile."""
+        idle_since = transport.idle_since
+        transport.idle_timer = threading.Timer(self._idle_timeout, self._evict, (transport, idle_since))
+        transport.idle_timer.daemon = True  # does not keep the process alive
+        transport.idle_timer.start()
+
+    def _evict(self, transport, idle_since):
+        """Closes the connection, if still idle since the time given."""
+        to_close = []
+        with self._lock:
+            if transport.idle_since == idle_since and self._connections.get(id(transport.connection)) is transport:
+                transport.idle_timer = None
+                to_close.append(self._unregister(transport))
+        self._close(to_close)
+
+    def _unregister(self, transport):
+        """The connection is not given to new holders anymore. Returns the connection if it must be closed."""
+        self._stop_idle_timer(transport)
+        if self._transports.get(transport.key) is transport:
+            del self._transports[transport.key]
+        if not transport.holders:
+            self._connections.pop(id(transport.connection), None)
+            return transport.connection
+        return None
+
+    def _expired(self):
+        """Unregisters the connections idle for too long. Returns the connections to be closed."""
+        now = time.time()
+        return [self._unregister(transport) for transport in list(self._transports.values())
+                if transport.idle_since is not None and now - transport.idle_since >= self._idle_timeout]
+
+    @staticmethod
+    def _close(connections):
+        """Closes the connections, outside the lock: it can take a while."""
+        for connection in connections:
+            if connection is not None:
+                connection.close()
+
+    def acquire(self, key, password, connect):
+        """
+        Returns a connection for the key, reusing the connection registered if healthy and opened using the same
+        password; otherwise opens a new one using connect(), which replaces the one registered, once authenticated.
+
+        :param key: Tuple (hostname, port, username)
+        :param password: Password of the device.
+        :param connect: Callable opening and returning a new pyPluribus.transport.Transport
+        :return: pyPluribus.transport.Transport, to be given back using release()
+        """
+        digest = self._digest(password)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:  # a single handshake for the devices opening the same connection at the same time
+            reused = None
+            with self._lock:
+                to_close = self._expired()
+                transport = self._transports.get(key)
+                if transport is not None:
+                    if not self._healthy(transport):
+                        to_close.append(self._unregister(transport))
+                    elif hmac.compare_digest(transport.digest, digest):
+                        transport.holders += 1
+                        transport.idle_since = None
+                        self._stop_idle_timer(transport)
+                        reused = transport.connection
+            self._close(to_close)
+            if reused is not None:
+                return reused
+            connection = connect()  # a wrong password does not affect the connection registered
+            transport = _SharedTransport(key, connection, digest)
+            transport.holders = 1
+            with self._lock:
+                replaced = self._transports.get(key)
+                to_close = [self._unregister(replaced)] if replaced is not None else []
+                self._transports[key] = transport
+                self._connections[id(connection)] = transport
+            self._close(to_close)
+        return connection
+
+    def release(self, connection, reusable=True):
+        """
+        Gives back a connection returned by acquire(). The connection is closed when not used by any device
+        and idle for `idle_timeout` seconds, or right away when not reusable.
+
+        :param connection: pyPluribus.transport.Transport
+        :param reusable: False when the connection is not usable anymore, e.g. the device asks to log in again.
+        """
+        with self._lock:
+            transport = self._connections.get(id(connection))
+            if transport is None:  # not registered
+                to_close = [connection]
+            else:
+                transport.holders -= 1
+                to_close = self._expired()
+                if not reusable:
+                    to_close.append(self._unregister(transport))
+                elif not transport.holders:
+                    transport.idle_since = time.time()
+                    if not self._idle_timeout or self._transports.get(transport.key) is not transport:
+                        to_close.append(self._unregister(transport))
+                    else:
+                        self._start_idle_timer(transport)
+        self._close(to_close)
+
+    def invalidate(self, connection):
+        """The connection is not given to new holders anymore; the current holders can use it till released."""
+        to_close = []
+        with self._lock:
+            transport = self._connections.get(id(connection))
+            if transport is not None:
+                to_close.append(self._unregister(transport))
+        self._close(to_close)
+
+    def session_limit(self, key, max_sessions):
+        """
+        The semaphore limiting the number of sessions open at the same time on the connections of a key, by all the
+        devices sharing them: the SSH server limits the number of sessions per connection. The limit is set by the
+        first device asking for it.
+
+        :param key: Tuple (hostname, port, username)
+        :param max_sessions: Maximum number of sessions. 0 or None: no limit.
+        :return: threading.BoundedSemaphore or None
+        """
+        with self._lock:
+            if key not in self._session_limits:
+                self._session_limits[key] = threading.BoundedSemaphore(max_sessions) if max_sessions else None
+            return self._session_limits[key]
+
+    def evict_idle(self):
+        """
+        Closes the connections not used by any device and idle for more than `idle_timeout` seconds, without waiting
+        for their timers.
+        """
+        with self._lock:
+            to_close = self._expired()
+        self._close(to_close)
+
+    def close_all(self):
+        """Closes all the connections, used or not."""
+        with self._lock:
+            to_close = [transport.connection for transport in self._connections.values()]
+            for transport in self._connections.values():
+                self._stop_idle_timer(transport)
+            self._transports = {}
+            self._connections = {}
+        self._close(to_close)
+
+    def __len__(self):
+        """Number of connections registered, available to new holders."""
+        with self._lock:
+            return len(self._transports)
+
+
+SHARED_TRANSPORTS = TransportRegistry()
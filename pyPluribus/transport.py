@@ -0,0 +1,418 @@
+# -*- coding: utf-8 -*-
+# Copyright 2016 CloudFlare, Inc. All rights reserved.
+#
+# The contents of this file are licensed under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with the
+# License. You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""
+Transport backends: the connection with the device, and the sessions in which the commands are executed.
+
+    * `paramiko` (default): SSH connection opened by paramiko, imported only when the first connection is opened,
+      thus the tools only parsing saved outputs do not pay for it
+    * `openssh`: the ssh command of the system, the sessions being multiplexed over one master connection
+      (ControlMaster). The settings of ~/.ssh/config apply. POSIX only
+    * `fake`: a pyPluribus.fake.FakeSwitch in the same process, without SSH
+
+A backend is a subclass of Transport; its sessions have the same interface as paramiko.Channel, reduced to the
+methods used by PluribusDevice: settimeout(), exec_command(), invoke_shell(), sendall(), recv(), recv_ready(),
+recv_stderr(), recv_stderr_ready(), fileno(), close() and the eof_received attribute.
+
+Example:
+
+.. code-block:: python
+
+    from pyPluribus import PluribusDevice
+
+    device = PluribusDevice('sw50.jnb01', 'username', 'password', transport='openssh',
+                            transport_options={'ssh_options': ['-i', '/home/me/.ssh/pluribus']})
+"""
+
+from __future__ import absolute_import
+
+import importlib
+import os
+import re
+import select
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # not POSIX
+    fcntl = None
+
+# local modules
+import pyPluribus.exceptions
+
+
+BACKENDS = {
+    'paramiko': 'pyPluribus.transport.ParamikoTransport',
+    'openssh': 'pyPluribus.transport.OpenSSHTransport',
+    'fake': 'pyPluribus.fake.FakeTransport'
+}
+
+
+def get_backend(transport):
+    """
+    Returns the Transport subclass of a backend.
+
+    :param transport: Name of the backend (see BACKENDS), or a Transport subclass.
+    """
+    if isinstance(transport, type):
+        return transport
+    if transport not in BACKENDS:
+        raise ValueError('Unknown transport: {transport}. Available: {backends}'.format(
+            transport=transport, backends=', '.join(sorted(BACKENDS))))
+    module_name, class_name = BACKENDS[transport].rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def session_errors():
+    """The exceptions raised by the sessions when the connection is not usable anymore."""
+    paramiko = sys.modules.get('paramiko')  # paramiko cannot raise anything if not imported
+    if paramiko is None:
+        return (socket.error, EnvironmentError)
+    return (socket.error, EnvironmentError, paramiko.SSHException)
+
+
+class Transport(object):
+
+    """Connection with one device. Subclass it to add a backend."""
+
+    def __init__(self, hostname, port, username, password,  # pylint: disable=too-many-arguments
+                 timeout=60, keepalive=60):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.keepalive = keepalive
+
+    def connect(self):
+        """
+        Opens the connection.
+
+        :raise pyPluribus.exceptions.ConnectionError: when the connection cannot be opened
+        """
+        raise NotImplementedError
+
+    def open_session(self):
+        """Opens a new session, in which one command is executed or a shell is started."""
+        raise NotImplementedError
+
+    def is_active(self):
+        """Tells if the connection is open, without sending anything."""
+        raise NotImplementedError
+
+    def check(self):
+        """Tells if the connection is usable, probing it when possible."""
+        return self.is_active()
+
+    def close(self):
+        """Closes the connection."""
+        raise NotImplementedError
+
+
+# ----- paramiko ------------------------------------------------------------------------------------------------------>
+
+class ParamikoTransport(Transport):
+
+    """SSH connection opened by paramiko."""
+
+    def __init__(self, *args, **kwargs):
+        super(ParamikoTransport, self).__init__(*args, **kwargs)
+        self._client = None
+
+    def connect(self):
+        import paramiko  # imported when needed: slow, and not necessary to parse the outputs
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            client.connect(hostname=self.hostname,
+                           username=self.username,
+                           password=self.password,
+                           timeout=self.timeout,
+                           port=self.port)
+            client.get_transport().set_keepalive(self.keepalive)
+            # one request-response per command: do not let Nagle delay the small packets
+            client.get_transport().sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except paramiko.ssh_exception.AuthenticationException:
+            client.close()
+            raise pyPluribus.exceptions.ConnectionError("Unable to open connection with {hostname}: \
+                invalid credentials!".format(hostname=self.hostname))
+        except socket.gaierror as sockgai:  # subclass of socket.error: must be caught first
+            client.close()
+            raise pyPluribus.exceptions.ConnectionError("Cannot open connection: {gaierr}. \
+                Wrong hostname?".format(gaierr=sockgai))
+        except socket.error as sockerr:
+            client.close()
+            raise pyPluribus.exceptions.ConnectionError("Cannot open connection: {skterr}. \
+                Wrong port?".format(skterr=sockerr))
+        self._client = client
+
+    def open_session(self):
+        return self._client.get_transport().open_session()
+
+    def is_active(self):
+        transport = self._client.get_transport()
+        return transport is not None and transport.is_active() and transport.is_authenticated()
+
+    def check(self):
+        if not self.is_active():
+            return False
+        try:
+            self._client.get_transport().send_ignore()  # fails when the connection is broken, but not detected yet
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return True
+
+    def close(self):
+        self._client.close()
+
+# <---- paramiko -------------------------------------------------------------------------------------------------------
+
+
+# ----- OpenSSH ------------------------------------------------------------------------------------------------------->
+
+# the password is read from a file next to the script, readable only by the user, and removed once connected
+_ASKPASS_SCRIPT = '#!/bin/sh\ncat "$(dirname "$0")/password"\n'
+
+# started with a pipe from the Python process as stdin: when the pipe is closed, e.g. the Python process died
+# without closing the connection, stops the master connection ("$@") and removes the control directory ("$0")
+_WATCHDOG_SCRIPT = 'trap "" HUP INT; read _; "$@" >/dev/null 2>&1; rm -rf "$0"'
+
+
+class _ProcessSession(object):
+
+    """Session executed by a ssh process, attached to the master connection."""
+
+    def __init__(self, ssh_command):
+        """
+        :param ssh_command: Function returning the command line of ssh, receiving the options.
+        """
+        self._ssh_command = ssh_command
+        self._process = None
+        self._timeout = None
+        self._eof = False
+        self._stderr_eof = False
+        self._stderr_chunks = []  # received on stderr, not read yet
+
+    @property
+    def eof_received(self):
+        """EOF on stdout; then everything sent on stderr is received as well."""
+        return self._eof
+
+    def settimeout(self, timeout):
+        """Number of seconds recv() waits for data; None: no limit."""
+        self._timeout = timeout
+
+    def exec_command(self, command):
+        """Executes a command."""
+        with open(os.devnull, 'rb') as devnull:
+            self._process = subprocess.Popen(self._ssh_command('-n', '-T') + [command], stdin=devnull,
+                                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def invoke_shell(self):
+        """Starts an interactive shell, without PTY."""
+        self._process = subprocess.Popen(self._ssh_command('-T'), stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def sendall(self, data):
+        """Sends data to the shell."""
+        self._process.stdin.write(data)
+        self._process.stdin.flush()
+
+    @staticmethod
+    def _ready(stream, timeout):
+        """Tells if a stream can be read without blocking."""
+        return bool(select.select([stream], [], [], timeout)[0])
+
+    def _read_stderr(self, timeout):
+        """Receives the next chunk from stderr. Returns False when nothing is received in time."""
+        if not self._ready(self._process.stderr, timeout):
+            return False
+        data = os.read(self._process.stderr.fileno(), 1048576)
+        if data:
+            self._stderr_chunks.append(data)
+        else:
+            self._stderr_eof = True
+        return True
+
+    def recv(self, size):
+        """Receives from stdout, at most `size` bytes; returns b'' at EOF."""
+        if self._eof:
+            return b''
+        if not self._ready(self._process.stdout, self._timeout):
+            raise socket.timeout('timed out')
+        data = os.read(self._process.stdout.fileno(), size)
+        if not data:
+            self._eof = True
+            while not self._stderr_eof:  # as on a SSH channel, stderr is complete at EOF
+                if not self._read_stderr(self._timeout):
+                    raise socket.timeout('timed out')
+        return data
+
+    def recv_ready(self):
+        """Tells if recv() returns without blocking."""
+        return not self._eof and self._ready(self._process.stdout, 0)
+
+    def recv_stderr_ready(self):
+        """Tells if recv_stderr() returns without blocking."""
+        if not self._stderr_chunks and not self._stderr_eof:
+            self._read_stderr(0)
+        return bool(self._stderr_chunks)
+
+    def recv_stderr(self, size):
+        """Returns at most `size` bytes received on stderr."""
+        data = b''.join(self._stderr_chunks)
+        self._stderr_chunks = [data[size:]] if len(data) > size else []
+        return data[:size]
+
+    def fileno(self):
+        """File descriptor signalling the data received on stdout."""
+        return self._process.stdout.fileno()
+
+    def close(self):
+        """Terminates the ssh process."""
+        if self._process is None:
+            return
+        if self._process.poll() is None:
+            self._process.terminate()
+        for stream in (self._process.stdin, self._process.stdout, self._process.stderr):
+            if stream is not None:
+                stream.close()
+        self._process.wait()
+
+
+class OpenSSHTransport(Transport):
+
+    """
+    Master connection opened by the ssh command of the system (ControlMaster): every session is a new ssh process,
+    multiplexed over the master connection, thus without SSH handshake.
+    The password is given to ssh through SSH_ASKPASS (OpenSSH 8.4 or newer); without password, ssh uses the keys.
+    The master connection is stopped by a watchdog process when the Python process exits without closing it.
+    """
+
+    def __init__(self, hostname, port, username, password,  # pylint: disable=too-many-arguments
+                 timeout=60, keepalive=60, ssh='ssh', ssh_options=None):
+        """
+        :param ssh: Path of the ssh command. Default: ssh
+        :param ssh_options: Extra arguments of the ssh command, e.g. ['-i', 'key', '-o', 'StrictHostKeyChecking=yes'].
+            They take precedence over the defaults. Default: none.
+        """
+        super(OpenSSHTransport, self).__init__(hostname, port, username, password, timeout, keepalive)
+        self._ssh = ssh
+        self._ssh_options = list(ssh_options or [])
+        self._control_dir = None
+        self._control_path = None
+        self._watchdog = None
+
+    def _ssh_command(self, *options):
+        """Command line of ssh, using the master connection; the command to be executed can be appended."""
+        return [self._ssh] + self._ssh_options + list(options) + [
+            '-S', self._control_path,
+            '-p', str(self.port),
+            '-l', self.username,
+            # ssh uses the first value set: the options above take precedence
+            '-o', 'StrictHostKeyChecking=no',
+            '-o', 'UserKnownHostsFile={devnull}'.format(devnull=os.devnull),
+            '-o', 'LogLevel=ERROR',
+            self.hostname
+        ]
+
+    def connect(self):
+        self._control_dir = tempfile.mkdtemp(prefix='pyPluribus-')
+        self._control_path = os.path.join(self._control_dir, 'master')
+        environment = dict(os.environ)
+        options = ['-o', 'ControlMaster=yes', '-o', 'ControlPersist=yes',
+                   '-o', 'ConnectTimeout={timeout}'.format(timeout=int(self.timeout or 0)),
+                   '-o', 'ServerAliveInterval={keepalive}'.format(keepalive=int(self.keepalive or 0))]
+        password_path = os.path.join(self._control_dir, 'password')
+        if self.password:
+            askpass = os.path.join(self._control_dir, 'askpass')
+            with open(askpass, 'w') as askpass_file:
+                askpass_file.write(_ASKPASS_SCRIPT)
+            os.chmod(askpass, 0o700)
+            password_file = os.open(password_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(password_file, 'wb') as password_file:
+                password_file.write('{password}\n'.format(password=self.password).encode('utf-8'))
+            environment.update(SSH_ASKPASS=askpass, SSH_ASKPASS_REQUIRE='force')
+            environment.setdefault('DISPLAY', ':0')  # required by older versions of ssh to use SSH_ASKPASS
+            options += ['-o', 'NumberOfPasswordPrompts=1']
+        else:
+            options += ['-o', 'BatchMode=yes']
+        # -f: goes to background once authenticated; the errors are written to a file, as a pipe would be held open
+        try:
+            with tempfile.TemporaryFile() as err_file, open(os.devnull, 'rb') as devnull:
+                exit_status = subprocess.call(self._ssh_command('-f', '-N', *options), env=environment,
+                                              stdin=devnull, stdout=err_file, stderr=err_file)
+                err_file.seek(0)
+                err_output = err_file.read().decode('utf-8', 'replace').strip()
+        finally:
+            if os.path.exists(password_path):
+                os.remove(password_path)  # authenticated, or failed: not needed anymore
+        if exit_status:
+            shutil.rmtree(self._control_dir, ignore_errors=True)
+            if re.search(r'Permission denied|Too many authentication failures', err_output):
+                raise pyPluribus.exceptions.ConnectionError("Unable to open connection with {hostname}: \
+                    invalid credentials!".format(hostname=self.hostname))
+            if re.search(r'Could not resolve hostname', err_output):
+                raise pyPluribus.exceptions.ConnectionError("Cannot open connection: {err}. \
+                    Wrong hostname?".format(err=err_output))
+            raise pyPluribus.exceptions.ConnectionError("Cannot open connection: {err}. \
+                Wrong port?".format(err=err_output))
+        self._start_watchdog()
+
+    def _start_watchdog(self):
+        """Starts the process stopping the master connection when the Python process exits without closing it."""
+        with open(os.devnull, 'wb') as devnull:
+            self._watchdog = subprocess.Popen(['sh', '-c', _WATCHDOG_SCRIPT, self._control_dir] +
+                                              self._ssh_command('-O', 'exit'),
+                                              stdin=subprocess.PIPE, stdout=devnull, stderr=devnull)
+        if fcntl is not None:  # not inherited by the ssh processes of the sessions, which may outlive this one
+            flags = fcntl.fcntl(self._watchdog.stdin.fileno(), fcntl.F_GETFD)
+            fcntl.fcntl(self._watchdog.stdin.fileno(), fcntl.F_SETFD, flags | fcntl.FD_CLOEXEC)
+
+    def open_session(self):
+        if not self.is_active():
+            raise socket.error('The master connection with {hostname} is closed.'.format(hostname=self.hostname))
+        return _ProcessSession(self._ssh_command)
+
+    def _control(self, command):
+        """Sends a command to the master process. Returns True if successful."""
+        with open(os.devnull, 'wb') as devnull:
+            return subprocess.call(self._ssh_command('-O', command), stdin=devnull, stdout=devnull,
+                                   stderr=devnull) == 0
+
+    def is_active(self):
+        return self._control_path is not None and os.path.exists(self._control_path)
+
+    def check(self):
+        return self.is_active() and self._control('check')
+
+    def close(self):
+        if self._control_dir is None:
+            return
+        if self.is_active():
+            self._control('exit')
+        shutil.rmtree(self._control_dir, ignore_errors=True)
+        if self._watchdog is not None:
+            self._watchdog.stdin.close()  # nothing left to clean up
+            self._watchdog.wait()
+            self._watchdog = None
+        self._control_dir = None
+        self._control_path = None
+
+# <---- OpenSSH --------------------------------------------------------------------------------------------------------
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+
+"""
+BenchPluribus.py: benchmarks of the pyPluribus library, executed against the fake Pluribus SSH server
+(pyPluribus.fakeserver), thus the numbers do not depend on a real device or on the network.
+
+Every benchmark is executed several times, on the same generated data; the best and the median time are reported.
+The results can be saved and compared with the results of a previous run, to catch the regressions; the best times
+are compared, being the least affected by the other processes running on the machine:
+
+    python BenchPluribus.py --output before.json
+    python BenchPluribus.py --baseline before.json --tolerance 0.2
+
+The exit status is 1 when a benchmark is slower than the baseline by more than the tolerance.
+"""
+
+# stdlib
+from __future__ import absolute_import
+from __future__ import print_function
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+
+# local modules
+from pyPluribus import PluribusDevice
+from pyPluribus.fake import FakeSwitch
+from pyPluribus.fakeserver import FakePluribusServer
+from pyPluribus.objects import ConfigDiff
+from pyPluribus.parsers import parse_records
+
+__author__ = "Mircea Ulinic"
+__copyright__ = 'Copyright 2016, CloudFlare, Inc.'
+__license__ = "Apache"
+__maintainer__ = "Mircea Ulinic"
+__contact__ = "mircea@cloudflare.com"
+__status__ = "Prototype"
+
+
+# ----- Data ---------------------------------------------------------------------------------------------------------->
+
+L2_TABLE_COLUMNS = ('mac', 'vlan', 'vxlan', 'ip', 'ports', 'state', 'hostname', 'status')
+
+
+def l2_table_rows(size):
+    """Rows of the L2 table, always the same for the same size."""
+    return [('00:00:{0:02x}:{1:02x}:{2:02x}:01'.format(row >> 16 & 0xff, row >> 8 & 0xff, row & 0xff),
+             row % 4000 + 1, 0, '10.{0}.{1}.{2}'.format(row >> 16 & 0xff, row >> 8 & 0xff, row & 0xff),
+             row % 64 + 1, 'active,host', 'host{0}'.format(row), 'up') for row in range(size)]
+
+
+def running_config(size):
+    """Running config of `size` lines: VLANs, their ports and port settings."""
+    lines = []
+    for number in range(size // 3):
+        lines.append('vlan-create id {vlan} scope local description vlan{vlan}'.format(vlan=number + 2))
+        lines.append('vlan-port-add vlan-id {vlan} ports {port}'.format(vlan=number + 2, port=number % 64 + 1))
+        lines.append('port-config-modify port {port} description edge{number}'.format(port=number % 64 + 1,
+                                                                                      number=number))
+    return '\n'.join(lines[:size])
+
+
+def candidate_config(size, offset):
+    """Candidate config of `size` lines, creating VLANs not present in the running config."""
+    return '\n'.join('vlan-create id {vlan} scope local'.format(vlan=offset + number) for number in range(size))
+
+# <---- Data -----------------------------------------------------------------------------------------------------------
+
+
+# ----- Benchmarks ---------------------------------------------------------------------------------------------------->
+
+def _connect(server, **kwargs):
+    """Opens a connection with the fake server."""
+    device = PluribusDevice('127.0.0.1', server.username, server.password, port=server.port, **kwargs)
+    device.open()
+    return device
+
+
+def bench_cli(server, size, persistent_shell=False):
+    """Executes `size` show commands, one after another."""
+    device = _connect(server, persistent_shell=persistent_shell)
+    try:
+        started = time.time()
+        for _ in range(size):
+            device.cli('bootenv-show')
+        return time.time() - started
+    finally:
+        device.close()
+
+
+def bench_show_records(server, size):  # pylint: disable=unused-argument
+    """Retrieves the L2 table as records: transfer and parsing."""
+    device = _connect(server)
+    try:
+        started = time.time()
+        device.show_records('l2 table')
+        return time.time() - started
+    finally:
+        device.close()
+
+
+def bench_parse_records(server, size):
+    """Parses the parsable output of a show command: `size` rows, no transfer."""
+    lines = [';'.join(str(field) for field in row) for row in l2_table_rows(size)]
+    started = time.time()
+    for _ in parse_records(lines, 'l2-table-show', L2_TABLE_COLUMNS):
+        pass
+    return time.time() - started
+
+
+def bench_compare(server, size, structured=False):
+    """Compares the running config of `size` lines with the initial one, a few lines being changed."""
+    device = _connect(server)
+    try:
+        server.switch.running_config = running_config(size).splitlines()
+        device.config.compare()  # downloads the initial and the running config, not measured
+        for number in range(10):
+            server.switch.execute('vlan-delete id {vlan}'.format(vlan=number * 100 + 2))
+            server.switch.execute('vlan-create id {vlan} scope fabric'.format(vlan=number * 100 + 5000))
+        device.config.invalidate_cache()
+        device.config._running_config()  # pylint: disable=protected-access
+        started = time.time()
+        device.config.compare(structured=structured)
+        return time.time() - started
+    finally:
+        device.close()
+
+
+def bench_config_diff(server, size):  # pylint: disable=unused-argument
+    """Structured diff of two configurations of `size` lines, no transfer."""
+    old_config = running_config(size)
+    new_config = old_config.replace('scope local description vlan1', 'scope fabric description vlan1')
+    started = time.time()
+    ConfigDiff(old_config, new_config)
+    return time.time() - started
+
+
+def bench_load_rollback(server, size):
+    """Loads a candidate of `size` lines, commits, then rolls back, on a running config of 3000 lines."""
+    device = _connect(server, batch_window=8)
+    try:
+        server.switch.running_config = running_config(3000).splitlines()
+        started = time.time()
+        device.config.load_candidate(config=candidate_config(size, 10000))
+        device.config.commit()
+        device.config.rollback(1)
+        return time.time() - started
+    finally:
+        device.close()
+
+
+# name -> (function, size, unit of the size, keyword arguments)
+BENCHMARKS = [
+    ('cli', bench_cli, 500, 'commands', {}),
+    ('cli_persistent_shell', bench_cli, 500, 'commands', {'persistent_shell': True}),
+    ('show_records', bench_show_records, 100000, 'rows', {}),
+    ('parse_records', bench_parse_records, 100000, 'rows', {}),
+    ('compare', bench_compare, 50000, 'lines', {}),
+    ('compare_structured', bench_compare, 50000, 'lines', {'structured': True}),
+    ('config_diff', bench_config_diff, 50000, 'lines', {}),
+    ('load_rollback', bench_load_rollback, 2000, 'lines', {}),
+]
+
+# <---- Benchmarks -----------------------------------------------------------------------------------------------------
+
+
+def run(names=None, repeat=5, scale=1.0, latency=0.0):
+    """
+    Executes the benchmarks.
+
+    :param names: Names of the benchmarks to be executed. Default: all.
+    :param repeat: Number of executions of each benchmark.
+    :param scale: Multiplies the size of every benchmark, e.g. 0.1 for a quick run.
+    :param latency: Number of seconds spent by the fake switch executing each command.
+    :return: Dictionary name -> results
+    """
+    switch = FakeSwitch(hostname='127.0.0.1',
+                        tables={'bootenv-show': (('name', 'version', 'state', 'boot', 'dev', 'note'),
+                                                 [('primary', '2.5.0', 'active', 'yes', 'sda1', '')]),
+                                'l2-table-show': (L2_TABLE_COLUMNS, l2_table_rows(int(100000 * scale)))},
+                        latency=latency)
+    results = {}
+    with FakePluribusServer(switch) as server:
+        for name, function, size, unit, kwargs in BENCHMARKS:
+            if names and name not in names:
+                continue
+            size = max(int(size * scale), 1)
+            timings = []
+            for _ in range(repeat):
+                gc.collect()  # the garbage of the previous execution is not collected while measuring
+                timings.append(function(server, size, **kwargs))
+            timings.sort()
+            median = timings[len(timings) // 2]
+            results[name] = {
+                'size': size,
+                'unit': unit,
+                'best': timings[0],
+                'median': median,
+                'throughput': size / median if median else None
+            }
+            line = '{name:<24} {size:>8} {unit:<8} best {best:8.4f}s  median {median:8.4f}s  {rate:12.1f} {unit}/s'
+            print(line.format(name=name, rate=results[name]['throughput'] or 0, **results[name]))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Returns the names of the benchmarks slower than the baseline by more than the tolerance (fraction)."""
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline or baseline[name]['size'] != result['size']:
+            continue  # not comparable
+        ratio = result['best'] / baseline[name]['best'] if baseline[name]['best'] else 1.0
+        print('{name:<24} {ratio:6.2f}x baseline'.format(name=name, ratio=ratio))
+        if ratio > 1.0 + tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    """Executes the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description='Benchmarks pyPluribus against a fake Pluribus switch.')
+    parser.add_argument('names', nargs='*', help='Benchmarks to be executed. Default: all.')
+    parser.add_argument('--repeat', type=int, default=5, help='Executions of each benchmark. Default: 5')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplies the size of the benchmarks. Default: 1')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds per command on the fake switch.')
+    parser.add_argument('--output', help='Saves the results to a JSON file.')
+    parser.add_argument('--baseline', help='Compares the results with a JSON file saved by a previous run.')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Slowdown accepted when comparing with the baseline. Default: 0.2 (20%%)')
+    args = parser.parse_args()
+
+    results = run(args.names, args.repeat, args.scale, args.latency)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'repeat': args.repeat,
+                'latency': args.latency,
+                'results': results
+            }, output_file, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline['results'], args.tolerance)
+        if regressions:
+            print('Slower than the baseline: {names}'.format(names=', '.join(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""
+TestAsyncPluribus.py: tests AsyncPluribusDevice and AsyncPluribusConfig against a fake switch, in the same process
+(transport='fake'), thus no real device is required. Requires Python 3.5 or newer.
+"""
+
+# stdlib
+import asyncio
+import unittest
+
+# local modules
+import pyPluribus.exceptions
+from pyPluribus import AsyncPluribusDevice
+from pyPluribus.fake import FakeSwitch
+
+__author__ = "Mircea Ulinic"
+__copyright__ = 'Copyright 2016, CloudFlare, Inc.'
+__license__ = "Apache"
+__maintainer__ = "Mircea Ulinic"
+__contact__ = "mircea@cloudflare.com"
+__status__ = "Prototype"
+
+
+def _run(coroutine):
+    """Executes a coroutine in a new event loop, as asyncio.run() does on Python 3.7 or newer."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestAsyncPluribusDevice(unittest.TestCase):
+
+    """
+    Will test the show commands, the concurrent commands and the configuration changes from coroutines.
+    """
+
+    INITIAL_CONFIG = 'vlan-create id 1 scope local\n'
+
+    def setUp(self):
+        """Creates the fake switch and the device, outside any event loop."""
+        self.switch = FakeSwitch(hostname='sw01',
+                                 running_config=self.INITIAL_CONFIG,
+                                 tables={'vlan-show': (('id', 'scope'), [(1, 'local')])})
+        self.device = AsyncPluribusDevice('sw01', 'username', 'password', max_sessions=2, single_flight=False,
+                                          transport='fake', transport_options={'switch': self.switch})
+
+    async def _open_and_run(self, coroutine_function):
+        """Opens the connection, awaits the coroutine, then closes the connection."""
+        await self.device.open()
+        try:
+            return await coroutine_function()
+        finally:
+            await self.device.close()
+
+    def test_show(self):
+        """Will test if the show commands return the rows of the fake switch and the errors are raised."""
+        async def _show():
+            self.assertEqual(await self.device.show('vlan'), '1;local')
+            with self.assertRaises(pyPluribus.exceptions.CommandExecutionError):
+                await self.device.cli('fakecommand')
+        _run(self._open_and_run(_show))
+
+    def test_concurrent_commands(self):
+        """Will test if more commands than `max_sessions` can be awaited at the same time, in several loops."""
+        self.switch.latency = 0.05
+
+        async def _show_many():
+            return await asyncio.gather(*[self.device.show('vlan') for _ in range(5)])
+        for _ in range(2):  # the device is used by a new event loop each time
+            self.assertEqual(_run(self._open_and_run(_show_many)), ['1;local'] * 5)
+        self.assertEqual(self.switch.commands.count('vlan-show parsable-delim ;'), 10)
+
+    def test_relogin(self):
+        """Will test if the connection is opened again when the switch asks to log in, at most reconnect_attempts."""
+        async def _relogin():
+            self.switch.relogin = 1
+            self.assertEqual(await self.device.show('vlan'), '1;local')
+            self.switch.relogin = 10
+            with self.assertRaises(pyPluribus.exceptions.ConnectionError):
+                await self.device.show('vlan')
+            self.switch.relogin = 0
+        _run(self._open_and_run(_relogin))
+
+    def test_load_discard(self):
+        """Will load a configuration, compare, then discard it."""
+        async def _load_discard():
+            self.assertTrue(await self.device.config.load_candidate(config='vlan-create id 10 scope local'))
+            self.assertIn('vlan-create id 10 scope local', await self.device.config.compare())
+            await self.device.config.discard()
+        _run(self._open_and_run(_load_discard))
+        self.assertEqual(self.switch.running_config, self.INITIAL_CONFIG.splitlines())
+
+
+if __name__ == '__main__':
+    unittest.main()
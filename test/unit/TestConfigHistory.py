@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+"""
+TestConfigHistory.py: tests ConfigHistory, the history of the configurations stored as deltas from a base snapshot.
+No device is required.
+"""
+
+# stdlib
+from __future__ import absolute_import
+import random
+import unittest
+
+# local modules
+from pyPluribus.config import ConfigHistory
+
+__author__ = "Mircea Ulinic"
+__copyright__ = 'Copyright 2016, CloudFlare, Inc.'
+__license__ = "Apache"
+__maintainer__ = "Mircea Ulinic"
+__contact__ = "mircea@cloudflare.com"
+__status__ = "Prototype"
+
+
+def _config(vlans):
+    """Configuration creating the VLANs."""
+    return '\n'.join('vlan-create id {vlan} scope local'.format(vlan=vlan) for vlan in vlans)
+
+
+class TestConfigHistory(unittest.TestCase):
+
+    """
+    Will test if every version is rebuilt as appended, after deduplication, rebase, truncation and retention.
+    """
+
+    def assertHistory(self, history, configs):  # pylint: disable=invalid-name
+        """Every version of the history is the same as the configuration appended."""
+        self.assertEqual(len(history), len(configs))
+        self.assertEqual([history[index] for index in range(len(history))], configs)
+
+    def test_rebuild(self):
+        """Will test if the versions are rebuilt from the base and their deltas."""
+        configs = [_config(range(1, 20)), _config(range(1, 21)), _config(range(2, 21)), '']
+        history = ConfigHistory()
+        for config in configs:
+            history.append(config)
+        self.assertHistory(history, configs)
+        self.assertEqual(history[-1], '')
+
+    def test_dedup(self):
+        """Will test if the identical configurations are stored once."""
+        history = ConfigHistory()
+        for config in (_config(range(10)), _config(range(11)), _config(range(10))):
+            history.append(config)
+        self.assertHistory(history, [_config(range(10)), _config(range(11)), _config(range(10))])
+        self.assertEqual(len(history._deltas), 2)  # pylint: disable=protected-access
+
+    def test_rebuild_after_rebase(self):
+        """Will test if the versions are still rebuilt after the newest configuration became the base."""
+        configs = [_config(range(10)), _config(range(5, 15)), _config(range(100, 130))]
+        history = ConfigHistory()
+        for config in configs:
+            history.append(config)
+        self.assertEqual(history._base_lines, configs[-1].split('\n'))  # pylint: disable=protected-access
+        self.assertHistory(history, configs)
+        history.append(configs[0])
+        self.assertHistory(history, configs + configs[:1])
+
+    def test_max_size(self):
+        """Will test if the oldest versions are dropped, with their deltas."""
+        configs = [_config(range(number, number + 10)) for number in range(6)]
+        history = ConfigHistory(max_size=3)
+        for config in configs:
+            history.append(config)
+        self.assertHistory(history, configs[-3:])
+        self.assertLessEqual(len(history._deltas), 4)  # pylint: disable=protected-access
+
+    def test_truncate(self):
+        """Will test if the newest versions are dropped, and the history continues from the version kept."""
+        configs = [_config(range(number, number + 10)) for number in range(4)]
+        history = ConfigHistory()
+        for config in configs:
+            history.append(config)
+        history.truncate(2)
+        self.assertHistory(history, configs[:2])
+        history.append(configs[3])
+        self.assertHistory(history, configs[:2] + configs[3:])
+        history.truncate(0)
+        self.assertHistory(history, [])
+
+    def test_random_operations(self):
+        """Will compare the history with a list of configurations, after random operations."""
+        generator = random.Random(2016)
+        for max_size in (None, 1, 5):
+            history = ConfigHistory(max_size=max_size)
+            expected = []
+            vlans = set(range(20))
+            for _ in range(300):
+                if generator.random() < 0.1:
+                    size = generator.randint(0, len(expected))
+                    history.truncate(size)
+                    del expected[size:]
+                    continue
+                for _ in range(generator.randint(0, 15)):
+                    vlans.symmetric_difference_update([generator.randint(0, 60)])
+                history.append(_config(sorted(vlans)))
+                expected.append(_config(sorted(vlans)))
+                if max_size is not None:
+                    del expected[:-max_size]
+                self.assertHistory(history, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
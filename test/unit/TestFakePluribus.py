@@ -0,0 +1,536 @@
+# -*- coding: utf-8 -*-
+
+"""
+TestFakePluribus.py: tests PluribusDevice and PluribusConfig end to end, against the fake Pluribus SSH server
+(pyPluribus.fakeserver), thus no real device is required.
+"""
+
+# stdlib
+from __future__ import absolute_import
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+
+# local modules
+import pyPluribus.exceptions
+from pyPluribus import PluribusDevice, PluribusFleet
+from pyPluribus.cache import ShowCache
+from pyPluribus.fake import FakeSwitch
+from pyPluribus.fakeserver import FakePluribusServer
+from pyPluribus.instrumentation import MetricsCollector
+from pyPluribus.registry import TransportRegistry
+
+__author__ = "Mircea Ulinic"
+__copyright__ = 'Copyright 2016, CloudFlare, Inc.'
+__license__ = "Apache"
+__maintainer__ = "Mircea Ulinic"
+__contact__ = "mircea@cloudflare.com"
+__status__ = "Prototype"
+
+
+def _openssh_version():
+    """Version of the ssh command of the system, as a tuple; None when not available."""
+    try:
+        version = subprocess.Popen(['ssh', '-V'], stdout=subprocess.PIPE, stderr=subprocess.STDOUT).communicate()[0]
+    except OSError:
+        return None
+    match = re.search(r'OpenSSH_(\d+)\.(\d+)', version.decode('utf-8', 'replace'))
+    return tuple(int(number) for number in match.groups()) if match else None
+
+
+class TestFakePluribusDevice(unittest.TestCase):
+
+    """
+    Will open a connection with the fake switch and will test the show commands and the configuration changes.
+    """
+
+    INITIAL_CONFIG = 'vlan-create id 1 scope local\nigmp-snooping-modify disable\n'
+
+    @classmethod
+    def setUpClass(cls):
+        """Starts the fake server and opens the connection with it."""
+        cls.switch = FakeSwitch(hostname='127.0.0.1',
+                                running_config=cls.INITIAL_CONFIG,
+                                tables={'vlan-show': (('id', 'scope'), [(1, 'local')])},
+                                errors={r'speed Xg': 'port-storm-control-modify: invalid speed'})
+        cls.server = FakePluribusServer(cls.switch).start()
+        cls.device = PluribusDevice('127.0.0.1', 'username', 'password', port=cls.server.port)
+        cls.device.open()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Closes the connection and stops the fake server."""
+        cls.device.close()
+        cls.server.stop()
+
+    def test_show(self):
+        """Will test if the show commands return the rows of the fake switch."""
+        self.assertEqual(self.device.show('vlan').splitlines(), ['1;local'])
+        self.assertRaises(pyPluribus.exceptions.CommandExecutionError, self.device.cli, 'fakecommand')
+
+    def test_stderr_before_stdout(self):
+        """Will test if a large output on stderr, sent before the output, does not stall the command."""
+        self.switch.warnings = {r'^vlan-show': 'warning: ' + 'x' * 4 * 1024 * 1024}  # more than the SSH window
+        device = PluribusDevice('127.0.0.1', 'username', 'password', port=self.server.port, timeout=10)
+        device.open()
+        try:
+            self.assertEqual(device.show('vlan'), '1;local')
+        finally:
+            self.switch.warnings = {}
+            device.close()
+
+    def test_show_records(self):
+        """Will test the rows returned as records, with all the columns or only the columns requested."""
+        records = self.device.show_records('vlan')
+        self.assertEqual([(record.id, record.scope) for record in records], [('1', 'local')])
+        self.assertEqual([tuple(record) for record in self.device.show_records('vlan', columns=['scope'])],
+                         [('local',)])
+        switch = FakeSwitch(tables={'port-config-show': (('port', 'description'), [(1, 'uplink;to core')])})
+        device = PluribusDevice('sw01', 'username', 'password', transport='fake', transport_options={'switch': switch})
+        device.open()
+        try:
+            self.assertEqual(device.show_records('port config')[0].description, 'uplink;to core')
+        finally:
+            device.close()
+
+    def test_load_commit_rollback(self):
+        """Will load a configuration, commit, then rollback to the initial configuration."""
+        self.assertTrue(self.device.config.load_candidate(config='vlan-create id 10 scope local'))
+        self.assertTrue(self.device.config.changed())
+        self.assertTrue(self.device.config.commit())
+        self.assertIn('vlan-create id 10 scope local', self.switch.running_config)
+        self.assertTrue(self.device.config.rollback(1))
+        self.assertEqual(self.switch.running_config, self.INITIAL_CONFIG.splitlines())
+
+    def test_rollback_after_external_changes(self):
+        """Will test if the rollback reconciles the config actually running, changed on the switch meanwhile."""
+        switch = FakeSwitch(running_config=self.INITIAL_CONFIG)
+        device = PluribusDevice('sw01', 'username', 'password', transport='fake', transport_options={'switch': switch})
+        device.open()
+        try:
+            self.assertTrue(device.config.load_candidate(config='vlan-create id 5 scope local'))
+            self.assertTrue(device.config.commit())
+            switch.execute('vlan-delete id 5')  # not through the device
+            switch.execute('vlan-create id 6 scope local')
+            self.assertTrue(device.config.rollback(1))
+        finally:
+            device.close()
+        self.assertEqual(switch.running_config, self.INITIAL_CONFIG.splitlines())
+
+    def test_compare(self):
+        """Will test if the text diff and the structured diff are in the same order."""
+        self.assertTrue(self.device.config.load_candidate(config='vlan-create id 10 scope local'))
+        text = self.device.config.compare()
+        self.assertIn('-vlan-create id 10 scope local', text.splitlines())
+        self.assertEqual(self.device.config.compare(structured=True).text, text)
+        self.assertEqual(list(self.device.config.compare(structured=True).added),
+                         [('vlan', 'create', ('id', '10'))])
+        self.device.config.discard()
+        self.assertEqual(self.switch.running_config, self.INITIAL_CONFIG.splitlines())
+
+    def test_skip_unchanged(self):
+        """Will test if only the lines not running are sent, even when the switch was changed by other means."""
+        def _sent(commands):
+            return [command for command in self.switch.commands[commands:]
+                    if not command.startswith('running-config-show')]
+        config = 'vlan-create id 1 scope local\nvlan-create id 2 scope local'
+        commands = len(self.switch.commands)
+        self.assertTrue(self.device.config.load_candidate(config=config, skip_unchanged=True))
+        self.assertEqual(self.device.config.skipped(), 1)
+        self.assertEqual(_sent(commands), ['vlan-create id 2 scope local'])
+        self.switch.execute('vlan-delete id 2')  # not through the device: the cached running config is stale
+        commands = len(self.switch.commands)
+        self.assertTrue(self.device.config.load_candidate(config=config, skip_unchanged=True))
+        self.assertEqual(self.device.config.skipped(), 1)
+        self.assertEqual(_sent(commands), ['vlan-create id 2 scope local'])
+        self.assertIn('vlan-create id 2 scope local', self.switch.running_config)
+        self.device.config.discard()
+        self.assertEqual(self.switch.running_config, self.INITIAL_CONFIG.splitlines())
+
+    def test_load_progress(self):
+        """Will test if the progress is reported after every command, from a configuration and from a file."""
+        config = 'vlan-create id 10 scope local\nvlan-modify id 10 description edge\nvlan-create id 20 scope local\n'
+        handle, filename = tempfile.mkstemp()
+        try:
+            with os.fdopen(handle, 'w') as config_file:
+                config_file.write(config)
+            for source in ({'config': config}, {'filename': filename}):
+                reported = []
+                self.assertTrue(self.device.config.load_candidate(coalesce=True, progress=reported.append, **source))
+                self.assertEqual([(progress.applied, progress.skipped, progress.total) for progress in reported],
+                                 [(1, 0, 2), (2, 0, 2)])
+                self.assertEqual(reported[-1].eta, 0)
+                self.device.config.discard()
+        finally:
+            os.remove(filename)
+        self.assertEqual(self.switch.running_config, self.INITIAL_CONFIG.splitlines())
+
+    def test_load_invalid_config(self):
+        """Will test if the errors injected are raised and the configuration discarded."""
+        self.assertRaises(pyPluribus.exceptions.ConfigLoadError,
+                          self.device.config.load_candidate,
+                          config='vlan-create id 20 scope local\nport-storm-control-modify port 39 speed Xg')
+        self.assertEqual(self.switch.running_config, self.INITIAL_CONFIG.splitlines())
+
+    def test_batch_window_above_max_sessions(self):
+        """Will test if the sessions opened ahead never take all the sessions allowed."""
+        device = PluribusDevice('127.0.0.1', 'username', 'password', port=self.server.port, batch_window=16,
+                                max_sessions=3)
+        device.open()
+        outputs = []
+
+        def _commands():
+            """The last command is followed by a pause: meanwhile, sessions are opened ahead."""
+            for _ in range(5):
+                yield 'vlan-show'
+            time.sleep(0.5)
+
+        thread = threading.Thread(target=lambda: outputs.extend(device.cli_batch(_commands())))
+        thread.daemon = True
+        try:
+            thread.start()
+            thread.join(30)
+            self.assertFalse(thread.is_alive())
+            self.assertEqual(outputs, ['1:local'] * 5)
+        finally:
+            device.close()
+
+    def test_persistent_shell(self):
+        """Will test the commands executed in the persistent shell, and in new sessions when the shell is not usable."""
+        device = PluribusDevice('127.0.0.1', 'username', 'password', port=self.server.port, persistent_shell=True)
+        device.open()
+        try:
+            self.assertEqual(device.show('vlan'), '1;local')
+            self.assertRaises(pyPluribus.exceptions.CommandExecutionError, device.cli, 'fakecommand')
+            self.assertTrue(device.config.load_candidate(config='vlan-create id 60 scope local'))
+            self.assertIn('vlan-create id 60 scope local', self.switch.running_config)
+            device.config.discard()
+            # the shell is busy with the output of another command: executed in a new session
+            output = device.cli_iter('vlan-show')
+            self.assertEqual(next(output), '1:local')
+            self.assertEqual(device.cli('vlan-show'), '1:local')
+            self.assertEqual(list(output), [])
+            # the shell is lost before sending a show command: executed in a new session, then the shell is opened
+            # again for the next command
+            device._shell.close()  # pylint: disable=protected-access
+            commands = len(self.switch.commands)
+            self.assertEqual(device.cli('vlan-show'), '1:local')
+            self.assertEqual(device.cli('vlan-show'), '1:local')
+            self.assertEqual(self.switch.commands[commands:], ['vlan-show'] * 2)
+            self.assertIsNotNone(device._shell)  # pylint: disable=protected-access
+        finally:
+            device.close()
+        self.assertEqual(self.switch.running_config, self.INITIAL_CONFIG.splitlines())
+
+    def test_fleet(self):
+        """Will test if the results of every device are collected, and the devices can be told apart."""
+        devices = [PluribusDevice(hostname, 'username', 'password', transport='fake',
+                                  transport_options={'switch': self.switch}) for hostname in ('sw01', 'sw02')]
+        fleet = PluribusFleet(devices, max_workers=1)
+        fleet.open()
+        try:
+            results = fleet.show('vlan')
+        finally:
+            fleet.close()
+        self.assertEqual(sorted(results), ['sw01', 'sw02'])
+        self.assertEqual([result.result for result in results.values()], ['1;local'] * 2)
+        self.assertRaises(ValueError, PluribusFleet, devices + devices[:1])
+
+    def test_instrumentation(self):
+        """Will test if the commands and the configuration operations are reported."""
+        metrics = MetricsCollector()
+        device = PluribusDevice('127.0.0.1', 'username', 'password', port=self.server.port, instrumentation=metrics)
+        device.open()
+        try:
+            device.show('vlan')
+            device.config.compare()
+        finally:
+            device.close()
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['commands']['vlan-show']['count'], 1)
+        self.assertGreater(snapshot['commands']['vlan-show']['bytes_read'], 0)
+        self.assertEqual(snapshot['spans']['compare']['count'], 1)
+
+    def test_show_cache(self):
+        """Will test if the show outputs are cached till a command other than show-type is executed."""
+        show_cache = ShowCache(ttl=60)
+        device = PluribusDevice('127.0.0.1', 'username', 'password', port=self.server.port, show_cache=show_cache)
+        device.open()
+
+        def vlan_show_count():
+            """Number of vlan-show commands received by the switch so far."""
+            return sum(1 for command in self.switch.commands if command.startswith('vlan-show'))
+        try:
+            vlan_shows = vlan_show_count()
+            self.assertEqual(device.show('vlan'), device.show('vlan'))
+            self.assertEqual(vlan_show_count(), vlan_shows + 1)  # the second output comes from the cache
+            device.cli('vlan-create id 30 scope local')
+            device.cli('vlan-delete id 30')
+            device.show('vlan')
+            self.assertEqual(vlan_show_count(), vlan_shows + 2)
+        finally:
+            device.close()
+        self.assertEqual(show_cache.stats()[:3], (1, 2, 1))  # hits, misses, invalidations
+
+    def test_single_flight(self):
+        """Will test if the same show command, executed by many threads at the same time, is sent only once."""
+        outputs = []
+        threads = [threading.Thread(target=lambda: outputs.append(self.device.show('vlan'))) for _ in range(10)]
+        commands = len(self.switch.commands)
+        self.switch.latency = 0.5
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            self.switch.latency = 0.0
+        self.assertEqual(outputs, ['1;local'] * 10)
+        self.assertEqual(len(self.switch.commands), commands + 1)
+
+    def test_reconnect(self):
+        """Will test if the connection is opened again when the switch asks to log in, keeping the config object."""
+        device = PluribusDevice('127.0.0.1', 'username', 'password', port=self.server.port, reconnect_backoff=0.01)
+        device.open()
+        try:
+            config = device.config
+            self.assertTrue(config.load_candidate(config='vlan-create id 40 scope local'))
+            downloads = self.switch.commands.count('running-config-show parsable-delim ;')
+            self.switch.relogin = 1
+            self.assertEqual(device.show('vlan'), '1;local')
+            self.assertIs(device.config, config)
+            # the running config is not downloaded again and the changes not committed are still known
+            self.assertEqual(self.switch.commands.count('running-config-show parsable-delim ;'), downloads)
+            self.assertTrue(config.changed())
+            self.switch.relogin = 10
+            self.assertRaises(pyPluribus.exceptions.ConnectionError, device.show, 'vlan')
+            self.switch.relogin = 0
+            device.reconnect()
+            config.discard()
+        finally:
+            device.close()
+        self.assertEqual(self.switch.running_config, self.INITIAL_CONFIG.splitlines())
+
+    def test_shared_transport(self):
+        """Will test if the devices having the same credentials share the SSH connection, and only them."""
+        registry = TransportRegistry(idle_timeout=60)
+        connections = self.server.connections
+        devices = [PluribusDevice('127.0.0.1', 'username', 'password', port=self.server.port,
+                                  transport_registry=registry) for _ in range(3)]
+        try:
+            for device in devices:
+                device.open()
+                self.assertEqual(device.show('vlan'), '1;local')
+            self.assertEqual(self.server.connections, connections + 1)
+            devices[0].close()
+            self.assertEqual(devices[1].show('vlan'), '1;local')  # still open for the others
+            wrong_password = PluribusDevice('127.0.0.1', 'username', 'wrong', port=self.server.port,
+                                            transport_registry=registry)
+            self.assertRaises(pyPluribus.exceptions.ConnectionError, wrong_password.open)
+            devices[0].open()
+            self.assertEqual(self.server.connections, connections + 2)  # + the failed handshake
+        finally:
+            for device in devices:
+                device.close()
+        self.assertEqual(len(registry), 1)  # idle, kept open for the next device
+        registry.close_all()
+        self.assertEqual(len(registry), 0)
+
+    def test_idle_transport(self):
+        """Will test if the connection not used by any device is closed after `idle_timeout` seconds."""
+        registry = TransportRegistry(idle_timeout=0.2)
+        device = PluribusDevice('127.0.0.1', 'username', 'password', port=self.server.port,
+                                transport_registry=registry)
+        device.open()
+        device.close()
+        self.assertEqual(len(registry), 1)
+        device.open()  # reused before the timeout
+        time.sleep(0.4)
+        self.assertEqual(len(registry), 1)
+        self.assertEqual(device.show('vlan'), '1;local')
+        device.close()
+        deadline = time.time() + 10
+        while len(registry) and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(len(registry), 0)
+
+    def test_fake_transport(self):
+        """Will test if the commands are executed on the fake switch in the same process, without SSH."""
+        connections = self.server.connections
+        device = PluribusDevice('127.0.0.1', 'username', 'password', transport='fake',
+                                transport_options={'switch': self.switch})
+        device.open()
+        try:
+            self.assertEqual(device.show('vlan'), '1;local')
+            self.assertRaises(pyPluribus.exceptions.CommandExecutionError, device.cli, 'fakecommand')
+            self.assertTrue(device.config.load_candidate(config='vlan-create id 50 scope local'))
+            self.assertIn('vlan-create id 50 scope local', self.switch.running_config)
+            device.config.discard()
+        finally:
+            device.close()
+        self.assertEqual(self.switch.running_config, self.INITIAL_CONFIG.splitlines())
+        self.assertEqual(self.server.connections, connections)
+
+
+@unittest.skipUnless((_openssh_version() or (0,)) >= (8, 4), 'requires OpenSSH 8.4 or newer')
+class TestOpenSSHTransport(unittest.TestCase):
+
+    """
+    Will open a connection with the fake server using the ssh command of the system.
+    """
+
+    PASSWORD = 'S3cr3t-pa55word'
+
+    def setUp(self):
+        self.switch = FakeSwitch(hostname='127.0.0.1', running_config='vlan-create id 1 scope local',
+                                 tables={'vlan-show': (('id', 'scope'), [(1, 'local')])})
+        self.server = FakePluribusServer(self.switch, password=self.PASSWORD).start()
+        self.device = PluribusDevice('127.0.0.1', 'username', self.PASSWORD, port=self.server.port, timeout=10,
+                                     transport='openssh')
+
+    def tearDown(self):
+        self.device.close()
+        self.server.stop()
+
+    def test_commands(self):
+        """Will test the show commands and the configuration changes."""
+        self.device.open()
+        self.assertEqual(self.device.show('vlan'), '1;local')
+        self.assertRaises(pyPluribus.exceptions.CommandExecutionError, self.device.cli, 'fakecommand')
+        self.assertTrue(self.device.config.load_candidate(config='vlan-create id 10 scope local'))
+        self.assertIn('vlan-create id 10 scope local', self.switch.running_config)
+        self.device.config.discard()
+        self.assertEqual(self.switch.running_config, ['vlan-create id 1 scope local'])
+
+    def test_wrong_password(self):
+        """Will test if the authentication errors are raised."""
+        device = PluribusDevice('127.0.0.1', 'username', 'wrong', port=self.server.port, timeout=10,
+                                transport='openssh')
+        self.assertRaises(pyPluribus.exceptions.ConnectionError, device.open)
+
+    def test_password_not_kept(self):
+        """Will test if the password is neither left on the disk nor in the environment of the master connection."""
+        self.device.open()
+        transport = self.device._connection  # pylint: disable=protected-access
+        control_dir = transport._control_dir  # pylint: disable=protected-access
+        self.assertEqual(sorted(os.listdir(control_dir)), ['askpass', 'master'])
+        check = subprocess.Popen(transport._ssh_command('-O', 'check'),  # pylint: disable=protected-access
+                                 stdout=subprocess.PIPE, stderr=subprocess.STDOUT).communicate()[0]
+        master_environment = '/proc/{pid}/environ'.format(pid=re.search(br'pid=(\d+)', check).group(1).decode())
+        if os.path.exists(master_environment):
+            with open(master_environment, 'rb') as environment:
+                self.assertNotIn(self.PASSWORD.encode('utf-8'), environment.read())
+
+    def test_watchdog(self):
+        """Will test if the master connection is stopped when the Python process does not close it."""
+        self.device.open()
+        transport = self.device._connection  # pylint: disable=protected-access
+        control_dir = transport._control_dir  # pylint: disable=protected-access
+        watchdog = transport._watchdog  # pylint: disable=protected-access
+        watchdog.stdin.close()  # as when the Python process exits
+        watchdog.wait()
+        self.assertFalse(transport.is_active())
+        self.assertFalse(os.path.exists(control_dir))
+
+
+class TestInitialConfig(unittest.TestCase):
+
+    """
+    Will test when the initial config, necessary to discard or rollback the changes, is downloaded.
+    """
+
+    INITIAL_CONFIG = 'vlan-create id 1 scope local\n'
+    DOWNLOAD = 'running-config-show parsable-delim ;'
+
+    def setUp(self):
+        self.switch = FakeSwitch(running_config=self.INITIAL_CONFIG,
+                                 tables={'vlan-show': (('id', 'scope'), [(1, 'local')])})
+
+    def _device(self, initial_config):
+        """Opens a device using the fake switch."""
+        device = PluribusDevice('sw01', 'username', 'password', initial_config=initial_config, transport='fake',
+                                transport_options={'switch': self.switch})
+        device.open()
+        return device
+
+    def test_lazy_read_only(self):
+        """Will test if the initial config is not downloaded when the configuration is not changed."""
+        device = self._device('lazy')
+        self.assertEqual(device.show('vlan'), '1;local')
+        device.close()
+        self.assertNotIn(self.DOWNLOAD, self.switch.commands)
+
+    def test_lazy_before_change(self):
+        """Will test if the initial config is downloaded before the first change, and restored by discard()."""
+        device = self._device('lazy')
+        try:
+            device.cli('vlan-create id 10 scope local')
+            self.assertEqual(self.switch.commands, [self.DOWNLOAD, 'vlan-create id 10 scope local'])
+            device.config.discard()
+        finally:
+            device.close()
+        self.assertEqual(self.switch.running_config, self.INITIAL_CONFIG.splitlines())
+
+    def test_background(self):
+        """Will test if the first change waits for the download in background."""
+        self.switch.latency = 0.2
+        device = self._device('background')
+        try:
+            device.cli('vlan-create id 10 scope local')
+            self.assertEqual(self.switch.commands, [self.DOWNLOAD, 'vlan-create id 10 scope local'])
+            device.config.discard()
+        finally:
+            device.close()
+        self.assertEqual(self.switch.running_config, self.INITIAL_CONFIG.splitlines())
+
+    def test_background_error(self):
+        """Will test if the error of the download in background is raised by the first configuration operation."""
+        self.switch.errors = {r'^running-config-show': 'running-config-show: not ready'}
+        device = self._device('background')
+        try:
+            device.config._initial_config_thread.join()  # pylint: disable=protected-access
+            self.switch.errors = {}
+            self.assertRaises(pyPluribus.exceptions.CommandExecutionError, device.config.load_candidate,
+                              config='vlan-create id 10 scope local')
+            self.assertNotIn('vlan-create id 10 scope local', self.switch.commands)
+            self.assertTrue(device.config.load_candidate(config='vlan-create id 10 scope local'))  # downloaded again
+            self.assertEqual(self.switch.commands.count(self.DOWNLOAD), 2)
+            device.config.discard()
+        finally:
+            device.close()
+        self.assertEqual(self.switch.running_config, self.INITIAL_CONFIG.splitlines())
+
+
+class TestFakeSwitch(unittest.TestCase):
+
+    """
+    Will test the running config of the fake switch.
+    """
+
+    def test_running_config(self):
+        """Will test if the lines which are not commands are kept as they are, in order."""
+        running_config = 'vlan-create id 1 scope local\n\n#  initial   config\nvlan-modify id 1 stats'
+        switch = FakeSwitch(running_config=running_config)
+        self.assertEqual(switch.running_config,
+                         ['vlan-create id 1 scope local', '# initial config', 'vlan-modify id 1 stats'])
+        self.assertEqual(switch.execute('vlan-delete id 1'), ('', '', 0))
+        self.assertEqual(switch.running_config, ['# initial config'])
+
+    def test_configure_errors(self):
+        """Will test if creating an existing object, or modifying a missing one, fails and changes nothing."""
+        switch = FakeSwitch(running_config='vlan-create id 1 scope local')
+        self.assertEqual(switch.execute('vlan-create id 1 scope fabric'),
+                         ('', 'vlan-create: object already exists\n', 1))
+        self.assertEqual(switch.execute('vlan-modify id 2 stats'), ('', 'vlan-modify: object not found\n', 1))
+        self.assertEqual(switch.running_config, ['vlan-create id 1 scope local'])
+        self.assertEqual(switch.execute('vlan-modify id 1 stats'), ('', '', 0))
+        self.assertEqual(switch.execute('port-config-modify port 1 description edge'), ('', '', 0))  # port exists
+        self.assertEqual(switch.execute('igmp-snooping-modify disable'), ('', '', 0))  # global setting
+
+
+if __name__ == '__main__':
+    unittest.main()
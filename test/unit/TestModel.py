@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""
+TestModel.py: tests RunningConfig, the running configuration parsed and indexed, and its updates. No device is
+required.
+"""
+
+# stdlib
+from __future__ import absolute_import
+import unittest
+
+# local modules
+from pyPluribus.model import RunningConfig
+
+__author__ = "Mircea Ulinic"
+__copyright__ = 'Copyright 2016, CloudFlare, Inc.'
+__license__ = "Apache"
+__maintainer__ = "Mircea Ulinic"
+__contact__ = "mircea@cloudflare.com"
+__status__ = "Prototype"
+
+
+class TestRunningConfig(unittest.TestCase):
+
+    """
+    Will test the lookups and the commands applied to the model.
+    """
+
+    RUNNING_CONFIG = '\n'.join([
+        'vlan-create id 10 scope local',
+        'vlan-modify id 10 description edge stats',
+        'vlan-port-add vlan-id 10 ports 1-4',
+        'trunk-create name core05.scl01 port 4,8'
+    ])
+
+    def setUp(self):
+        self.model = RunningConfig(self.RUNNING_CONFIG)
+
+    def test_lookups(self):
+        """Will test the lookups by type, identifier, name and port."""
+        self.assertEqual(len(self.model), 4)
+        self.assertEqual(len(self.model.objects('vlan')), 2)
+        self.assertTrue(self.model.exists('vlan', 'id', 10))
+        self.assertFalse(self.model.exists('vlan', 'id', 20))
+        self.assertEqual([parsed.object for parsed in self.model.named('core05.scl01')], ['trunk'])
+        self.assertEqual([parsed.object for parsed in self.model.on_port(4)], ['vlan-port', 'trunk'])
+        self.assertEqual([parsed.key for parsed in self.model.on_port(8, 'trunk')], [('name', 'core05.scl01')])
+
+    def test_create_delete(self):
+        """Will test if the objects created and deleted are updated in the model."""
+        self.assertTrue(self.model.apply('vlan-create id 20 scope local'))
+        self.assertTrue(self.model.exists('vlan', 'id', 20))
+        self.assertTrue(self.model.apply('vlan-delete id 10'))
+        self.assertFalse(self.model.exists('vlan', 'id', 10))
+        self.assertEqual(self.model.lookup('vlan', 'id', 10), [])
+
+    def test_add_remove(self):
+        """Will test if only the lines removed exactly as they were added are removed from the model."""
+        self.assertTrue(self.model.apply('vlan-port-add vlan-id 10 ports 6'))
+        self.assertTrue(self.model.apply('vlan-port-remove vlan-id 10 ports 6'))
+        self.assertNotIn('vlan-port-add vlan-id 10 ports 6', self.model)
+        self.assertFalse(self.model.apply('vlan-port-remove vlan-id 10 ports 2'))  # only some of the ports
+        self.assertFalse(self.model.apply('vlan-port-remove vlan-id 20 ports 1'))  # never added
+
+    def test_modify(self):
+        """Will test if a line replaces the previous one only when restating all its settings."""
+        self.assertTrue(self.model.apply('vlan-modify id 10 description core no-stats'))
+        self.assertIn('vlan-modify id 10 description core no-stats', self.model)
+        self.assertNotIn('vlan-modify id 10 description edge stats', self.model)
+        self.assertFalse(self.model.apply('vlan-modify id 10 description edge'))  # `stats` not restated
+
+    def test_unknown_command(self):
+        """Will test if the commands of unknown effect are not applied."""
+        self.assertFalse(self.model.apply('running-config-show'))
+        self.assertFalse(self.model.apply('fakecommand'))
+        self.assertTrue(self.model.apply('  '))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+"""
+TestObjects.py: tests the functions handling the configuration as objects, e.g. reconcile(). No device is required.
+"""
+
+# stdlib
+from __future__ import absolute_import
+import unittest
+
+# local modules
+from pyPluribus.objects import ConfigDiff, compile_config, reconcile, setting
+
+__author__ = "Mircea Ulinic"
+__copyright__ = 'Copyright 2016, CloudFlare, Inc.'
+__license__ = "Apache"
+__maintainer__ = "Mircea Ulinic"
+__contact__ = "mircea@cloudflare.com"
+__status__ = "Prototype"
+
+
+class TestReconcile(unittest.TestCase):
+
+    """
+    Will test the commands computed to transform the running configuration into the target configuration.
+    """
+
+    RUNNING_CONFIG = '\n'.join([
+        'vlan-create id 10 scope local',
+        'vlan-port-add vlan-id 10 ports 1',
+        'vlan-create id 20 scope local',
+        'vlan-port-add vlan-id 20 ports 2'
+    ])
+
+    def test_same_config(self):
+        """Will test if nothing is executed when the configurations are the same, whitespaces aside."""
+        self.assertEqual(reconcile(self.RUNNING_CONFIG, '\n  ' + self.RUNNING_CONFIG + '\n\n'), [])
+
+    def test_added_lines(self):
+        """Will test if only the lines missing from the running configuration are executed."""
+        target_config = self.RUNNING_CONFIG + '\nvlan-create id 30 scope local\nvlan-port-add vlan-id 30 ports 3'
+        self.assertEqual(reconcile(self.RUNNING_CONFIG, target_config),
+                         ['vlan-create id 30 scope local', 'vlan-port-add vlan-id 30 ports 3'])
+
+    def test_removed_lines(self):
+        """Will test if the lines missing from the target are undone, in the reverse order."""
+        target_config = 'vlan-create id 10 scope local\nvlan-port-add vlan-id 10 ports 1'
+        self.assertEqual(reconcile(self.RUNNING_CONFIG, target_config),
+                         ['vlan-port-remove vlan-id 20 ports 2', 'vlan-delete id 20'])
+
+    def test_recreated_object(self):
+        """Will test if the lines referring to an object deleted and created again are executed again."""
+        target_config = '\n'.join([
+            'vlan-create id 10 scope fabric',
+            'vlan-port-add vlan-id 10 ports 1',
+            'vlan-create id 20 scope local',
+            'vlan-port-add vlan-id 20 ports 2'
+        ])
+        self.assertEqual(reconcile(self.RUNNING_CONFIG, target_config),
+                         ['vlan-delete id 10', 'vlan-create id 10 scope fabric', 'vlan-port-add vlan-id 10 ports 1'])
+
+    def test_modify_not_undone(self):
+        """Will test if the lines without inverse, missing from the target, are left as they are."""
+        running_config = self.RUNNING_CONFIG + '\nvlan-modify id 10 description edge'
+        self.assertEqual(reconcile(running_config, self.RUNNING_CONFIG), [])
+
+
+class TestConfigDiff(unittest.TestCase):
+
+    """
+    Will test the differences between two configurations, by object.
+    """
+
+    OLD_CONFIG = '\n'.join([
+        'vlan-create id 10 scope local',
+        'vlan-port-add vlan-id 10 ports 1',
+        'vlan-create id 20 scope local'
+    ])
+
+    def test_same_config(self):
+        """Will test if the order of the lines does not matter."""
+        diff = ConfigDiff(self.OLD_CONFIG, '\n'.join(reversed(self.OLD_CONFIG.splitlines())))
+        self.assertFalse(diff)
+        self.assertEqual(len(diff), 0)
+
+    def test_objects(self):
+        """Will test the objects added, removed and changed."""
+        new_config = '\n'.join([
+            'vlan-create id 10 scope fabric',
+            'vlan-create id 30 scope local'
+        ])
+        diff = ConfigDiff(self.OLD_CONFIG, new_config)
+        self.assertEqual(len(diff), 4)
+        self.assertEqual(diff.added, {('vlan', 'create', ('id', '30')): ('vlan-create id 30 scope local',)})
+        self.assertEqual(diff.removed, {
+            ('vlan', 'create', ('id', '20')): ('vlan-create id 20 scope local',),
+            ('vlan-port', 'add', ('vlan-id', '10', 'ports', '1')): ('vlan-port-add vlan-id 10 ports 1',)
+        })
+        self.assertEqual(diff.changed, {
+            ('vlan', 'create', ('id', '10')): (('vlan-create id 10 scope local',), ('vlan-create id 10 scope fabric',))
+        })
+
+    def test_text(self):
+        """Will test if the text diff is in the same order as PluribusConfig.compare()."""
+        diff = ConfigDiff(self.OLD_CONFIG, self.OLD_CONFIG + '\nvlan-create id 30 scope local')
+        self.assertEqual(diff.text.splitlines()[-1], '-vlan-create id 30 scope local')
+
+
+class TestCompileConfig(unittest.TestCase):
+
+    """
+    Will test the configuration compiled into fewer commands.
+    """
+
+    def test_canonical_lines(self):
+        """Will test if the whitespaces and the empty lines are removed."""
+        self.assertEqual(list(compile_config('  vlan-create   id 10\tscope local \n\n')),
+                         ['vlan-create id 10 scope local'])
+
+    def test_merged_lines(self):
+        """Will test if the consecutive lines setting different settings of the same object are merged."""
+        config = 'vlan-create id 10 scope local\nvlan-modify id 10 description edge\nvlan-create id 20 scope local'
+        self.assertEqual(list(compile_config(config)),
+                         ['vlan-create id 10 scope local description edge', 'vlan-create id 20 scope local'])
+
+    def test_same_setting(self):
+        """Will test if the lines changing the same setting twice are kept in order."""
+        config = 'vlan-modify id 10 description edge\nvlan-modify id 10 description core'
+        self.assertEqual(list(compile_config(config)), config.splitlines())
+        config = 'vlan-modify id 10 no-stats\nvlan-modify id 10 stats'
+        self.assertEqual(list(compile_config(config)), config.splitlines())
+
+    def test_setting(self):
+        """Will test if the opposite arguments change the same setting."""
+        self.assertEqual(setting('no-jumbo'), setting('jumbo'))
+        self.assertEqual(setting('disable'), setting('enable'))
+        self.assertNotEqual(setting('stats'), setting('description'))
+
+    def test_repeated_line(self):
+        """Will test if a line executed again is dropped, unless the object may have been changed meanwhile."""
+        config = '\n'.join([
+            'vlan-port-add vlan-id 10 ports 1',
+            'vlan-create id 20 scope local',
+            'vlan-port-add vlan-id 10 ports 1',
+            'vlan-delete id 10',
+            'vlan-port-add vlan-id 10 ports 1'
+        ])
+        self.assertEqual(list(compile_config(config)), [
+            'vlan-port-add vlan-id 10 ports 1',
+            'vlan-create id 20 scope local',
+            'vlan-delete id 10',
+            'vlan-port-add vlan-id 10 ports 1'
+        ])
+
+    def test_lazy(self):
+        """Will test if the configuration is compiled as it is read, from an iterable of lines."""
+        compiled = compile_config(iter(['vlan-create id 10 scope local\n', 'vlan-delete id 10\n']))
+        self.assertEqual(next(compiled), 'vlan-create id 10 scope local')
+        self.assertEqual(list(compiled), ['vlan-delete id 10'])
+
+
+if __name__ == '__main__':
+    unittest.main()
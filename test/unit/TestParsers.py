@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""
+TestParsers.py: tests the parsers of the output of the Pluribus CLI. No device is required.
+"""
+
+# stdlib
+from __future__ import absolute_import
+import unittest
+
+# local modules
+from pyPluribus.parsers import parse_records, record_class
+
+__author__ = "Mircea Ulinic"
+__copyright__ = 'Copyright 2016, CloudFlare, Inc.'
+__license__ = "Apache"
+__maintainer__ = "Mircea Ulinic"
+__contact__ = "mircea@cloudflare.com"
+__status__ = "Prototype"
+
+
+class TestParseRecords(unittest.TestCase):
+
+    """
+    Will test the records parsed from the parsable output of the show commands.
+    """
+
+    def test_header(self):
+        """Will test if the names of the columns are read from the header."""
+        records = list(parse_records(['id;scope;vlan-type', '1;local;public', '', '10;fabric;private'],
+                                     command='vlan-show'))
+        self.assertEqual([(record.id, record.scope, record.vlan_type) for record in records],
+                         [('1', 'local', 'public'), ('10', 'fabric', 'private')])
+        self.assertEqual(type(records[0]).__name__, 'vlan_show')
+
+    def test_columns(self):
+        """Will test if the first line is a row when the columns are specified."""
+        records = list(parse_records(['1:local'], command='vlan-show', columns=['id', 'scope'], delim=':'))
+        self.assertEqual([tuple(record) for record in records], [('1', 'local')])
+        self.assertEqual(records[0].scope, 'local')
+
+    def test_no_output(self):
+        """Will test if nothing is yielded when the output is empty."""
+        self.assertEqual(list(parse_records([], command='vlan-show')), [])
+        self.assertEqual(list(parse_records(['id;scope'], command='vlan-show')), [])
+
+    def test_delimiter_in_last_field(self):
+        """Will test if a delimiter inside the last field does not break the row."""
+        records = list(parse_records(['port;description', '1;uplink;to core'], command='port-config-show'))
+        self.assertEqual(records[0].description, 'uplink;to core')
+
+    def test_short_row(self):
+        """Will test if the rows having less fields than columns are padded with empty fields."""
+        records = list(parse_records(['id;scope;description', '1;local'], command='vlan-show'))
+        self.assertEqual(tuple(records[0]), ('1', 'local', ''))
+
+    def test_rename(self):
+        """Will test if the columns which are not valid identifiers are named positionally."""
+        records = list(parse_records(['id;1st;class;id', '1;a;b;c'], command='vlan-show'))
+        self.assertEqual(records[0]._fields, ('id', '_1', '_2', '_3'))
+        self.assertEqual(tuple(records[0]), ('1', 'a', 'b', 'c'))
+
+    def test_record_class_reused(self):
+        """Will test if the class is generated once for each command and set of columns."""
+        self.assertIs(record_class('vlan-show', ['id', 'scope']), record_class('vlan-show', ['id', 'scope']))
+        self.assertIsNot(record_class('vlan-show', ['id', 'scope']), record_class('vlan-show', ['id']))
+
+
+if __name__ == '__main__':
+    unittest.main()
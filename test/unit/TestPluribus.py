@@ -99,6 +99,14 @@ class TestPluribusDevice(unittest.TestCase):  # pylint: disable=too-many-public-
         wrong_command = 'fakecommand'
         self.assertRaises(pyPluribus.exceptions.CommandExecutionError, self.device.cli, wrong_command)
 
+    def test_raise_cli_batch(self):
+        """Will test cli_batch() to reference the line of the command that failed."""
+        commands = ['bootenv-show', 'fakecommand', 'bootenv-show']
+        with self.assertRaises(pyPluribus.exceptions.BatchExecutionError) as batch_context:
+            list(self.device.cli_batch(commands))
+        self.assertEqual(batch_context.exception.line_number, 2)
+        self.assertEqual(batch_context.exception.command, 'fakecommand')
+
     def test_execute_show(self):
         """Will try to execute a simple show command on the CLI."""
         bootenv = self.device.execute_show('bootenv-show')  # let's execute a simple show command
@@ -119,6 +127,30 @@ class TestPluribusDevice(unittest.TestCase):  # pylint: disable=too-many-public-
         mac_addr_table = self.device.show('l2 table')  # for sure this will always return some content
         self.assertGreater(len(mac_addr_table.splitlines()), 0)
 
+    def test_show_iter(self):
+        """Will test if show_iter() yields the same lines as show()."""
+        bootenv_lines = list(self.device.show_iter('bootenv'))
+        self.assertEqual(bootenv_lines, self.device.show('bootenv').splitlines())
+
+    def test_show_records(self):
+        """Will test if show_records() returns one record, with all the columns, for each line of show()."""
+        bootenv_records = self.device.show_records('bootenv')
+        self.assertEqual(len(bootenv_records), len(self.device.show('bootenv').splitlines()))
+        for record in bootenv_records:
+            self.assertEquals(len(record), 6)  # must have exactly 6 elements
+
+    def test_run_many(self):
+        """Will test if run_many() returns the outputs in the same order as the commands."""
+        outputs = self.device.run_many(['bootenv-show parsable-delim ;', 'fakecommand'], return_exceptions=True)
+        self.assertEqual(outputs[0], self.device.execute_show('bootenv-show'))
+        self.assertIsInstance(outputs[1], pyPluribus.exceptions.CommandExecutionError)
+
+    def test_config_model(self):
+        """Will test if the model of the running config has the same lines as the running config."""
+        running_config_lines = set(line.strip() for line in self.device.show('running config').splitlines())
+        running_config_lines.discard('')
+        self.assertEqual(set(self.device.config.model()), running_config_lines)
+
     # <---- Basic interaction ------------------------------------------------------------------------------------------
 
     # ----- Configuration management ---------------------------------------------------------------------------------->
@@ -198,9 +230,14 @@ if __name__ == '__main__':
     BASIC_COMMANDS.addTest(TestPluribusDevice("test_connection_open"))
     BASIC_COMMANDS.addTest(TestPluribusDevice("test_cli"))
     BASIC_COMMANDS.addTest(TestPluribusDevice("test_raise_cli"))
+    BASIC_COMMANDS.addTest(TestPluribusDevice("test_raise_cli_batch"))
     BASIC_COMMANDS.addTest(TestPluribusDevice("test_execute_show"))
     BASIC_COMMANDS.addTest(TestPluribusDevice("test_raise_execute_show"))
     BASIC_COMMANDS.addTest(TestPluribusDevice("test_show"))
+    BASIC_COMMANDS.addTest(TestPluribusDevice("test_show_iter"))
+    BASIC_COMMANDS.addTest(TestPluribusDevice("test_show_records"))
+    BASIC_COMMANDS.addTest(TestPluribusDevice("test_run_many"))
+    BASIC_COMMANDS.addTest(TestPluribusDevice("test_config_model"))
     TEST_RUNNER.run(BASIC_COMMANDS)
 
     FULL_CONFIG_SCENARIO = unittest.TestSuite()